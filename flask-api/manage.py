@@ -9,11 +9,13 @@ import click
 from flask.cli import FlaskGroup
 
 from project import app
-from project.extensions import db
+from project.extensions import db, push_sender
 from project.models.user import User
 from project.models.event_descriptor import EventDescriptor
 from project.models.group import Group
 from project.models.user_group_association import UserGroupAssociation
+from project.api.common.utils.one_time_tokens import DIGEST_PREFIX
+from project.api.common.utils.exports import iter_users_ndjson
 
 cli = FlaskGroup(app)
 
@@ -95,6 +97,89 @@ def seed_db():
     db.session.commit()
 
 
+@cli.command('clear_legacy_token_hashes')
+def clear_legacy_token_hashes():
+    """Clears one time token hashes still stored with bcrypt, affected users must request a new token."""
+    legacy = ~User.token_hash.startswith(DIGEST_PREFIX)
+    email_legacy = ~User.email_token_hash.startswith(DIGEST_PREFIX)
+    count = User.query.filter(User.token_hash.isnot(None), legacy).update({User.token_hash: None}, synchronize_session=False)
+    email_count = User.query.filter(User.email_token_hash.isnot(None), email_legacy).update({User.email_token_hash: None}, synchronize_session=False)
+    db.session.commit()
+    print(f'Cleared {count} password recovery and {email_count} email verification legacy token hashes.')
+
+
+@cli.command('export_users')
+@click.option('--output', type=click.File('wb'), default='-', help='NDJSON output file, stdout by default.')
+@click.option('--batch-size', default=None, type=int, help='Rows fetched per round trip.')
+def export_users(output, batch_size):
+    """Exports every user as NDJSON streaming rows through a server side cursor."""
+    for chunk in iter_users_ndjson(batch_size=batch_size or app.config['USER_EXPORT_BATCH_SIZE']):
+        output.write(chunk)
+
+
+@cli.command('process_events')
+def process_events():
+    """Processes the pending events right away (celery beat runs it periodically)."""
+    from project.tasks.push_notification_tasks import process_pending_events
+    print(f'{process_pending_events()} events processed')
+
+
+@cli.command('apply_event_retention')
+def event_retention():
+    """Creates upcoming events partitions, removes expired ones and purges expired events (celery beat runs it hourly)."""
+    from project.tasks.event_tasks import apply_event_retention
+    print(apply_event_retention())
+
+
+@cli.command('benchmark_bcrypt')
+@click.option('--target-ms', default=250, help='Target hash latency in milliseconds.')
+@click.option('--min-rounds', default=4, help='Lowest cost factor to benchmark.')
+@click.option('--max-rounds', default=15, help='Highest cost factor to benchmark.')
+@click.option('--samples', default=3, help='Hashes computed per cost factor.')
+def benchmark_bcrypt(target_ms, min_rounds, max_rounds, samples):
+    """Benchmarks bcrypt latency per cost factor on this machine and recommends BCRYPT_LOG_ROUNDS."""
+    import bcrypt
+    import time
+    recommended = min_rounds
+    print(f'{"rounds":>6} {"ms/hash":>10}')
+    for rounds in range(min_rounds, max_rounds + 1):
+        salt = bcrypt.gensalt(rounds=rounds)
+        start = time.perf_counter()
+        for _ in range(samples):
+            bcrypt.hashpw(b'benchmark-password', salt)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / samples
+        print(f'{rounds:>6} {elapsed_ms:>10.1f}')
+        if elapsed_ms <= target_ms:
+            recommended = rounds
+        else:
+            # each extra round doubles the cost, no need to keep going
+            break
+    print(f'Recommended BCRYPT_LOG_ROUNDS for a {target_ms}ms target: {recommended} '
+          f'(currently {app.config.get("BCRYPT_LOG_ROUNDS")})')
+
+
+@cli.command('benchmark_push')
+@click.option('--endpoint', default='http://localhost:8090/fcm/send', help='FCM endpoint, a tests.fcm_stub by default.')
+@click.option('--tokens', default=100000, help='Number of pushes to send.')
+@click.option('--concurrency', default=None, type=int, help='Concurrent provider requests, PUSH_SENDER_CONCURRENCY by default.')
+def benchmark_push(endpoint, tokens, concurrency):
+    """Measures push delivery throughput of one worker process (run it against tests.fcm_stub, never the real FCM)."""
+    import time
+    app.config['FCM_ENDPOINT'] = endpoint
+    if concurrency:
+        app.config['PUSH_SENDER_CONCURRENCY'] = concurrency
+    push_sender.init_app(app)
+    batch_size = app.config['PUSH_NOTIFICATIONS_CHUNK_SIZE']
+    pn_tokens = [f'benchmark-token-{i}' for i in range(tokens)]
+    batches = [pn_tokens[i:i + batch_size] for i in range(0, tokens, batch_size)]
+    start = time.perf_counter()
+    responses = push_sender.send_multicast(batches, message_title='benchmark', message_body='benchmark')
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for response in responses if response is None)
+    print(f'{tokens} pushes in {len(batches)} requests ({failed} failed) in {elapsed:.2f}s: '
+          f'{tokens / elapsed:.0f} pushes/s with concurrency {push_sender.concurrency}')
+    push_sender.close()
+
 @cli.command()
 def cov():
     """Runs the unit tests with coverage."""
@@ -0,0 +1,32 @@
+"""users token_version and keyset pagination index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 18:36:52.907113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the server default fills the existing rows, the model sets the value of the new ones
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+    op.alter_column('users', 'token_version', server_default=None)
+    # CREATE INDEX CONCURRENTLY can not run inside a transaction block, it does not lock users writes
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_created_at_id', table_name='users', postgresql_concurrently=True)
+    op.drop_column('users', 'token_version')
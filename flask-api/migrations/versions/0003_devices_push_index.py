@@ -0,0 +1,30 @@
+"""partial index for active device push lookups
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 18:42:10.311204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY can not run inside a transaction block, it does not lock devices writes
+    with op.get_context().autocommit_block():
+        op.create_index('ix_devices_push_user_id', 'devices', ['user_id'], unique=False,
+                        postgresql_where=sa.text('active AND pn_token IS NOT NULL'),
+                        postgresql_include=['pn_token'],
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_devices_push_user_id', table_name='devices', postgresql_concurrently=True)
@@ -0,0 +1,29 @@
+"""partial index for the unprocessed events claim query
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 19:20:42.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY can not run inside a transaction block, it does not lock events writes
+    with op.get_context().autocommit_block():
+        op.create_index('ix_events_unprocessed_id', 'events', ['id'], unique=False,
+                        postgresql_where=sa.text('NOT is_processed'),
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_events_unprocessed_id', table_name='events', postgresql_concurrently=True)
@@ -0,0 +1,71 @@
+"""partition events by created_at month
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 20:05:13.402871
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+# monthly partitions created ahead, the apply_event_retention task keeps creating them afterwards
+PREMAKE_MONTHS = 3
+
+
+def month_start(moment, months=0):
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def upgrade():
+    # the existing rows are not copied: the former table is attached as the partition holding everything created
+    # up to the end of the current month (or of the latest row one), it is only dropped once all its events are expired
+    latest_created_at = op.get_bind().execute(sa.text('SELECT max(created_at) FROM events')).scalar()
+    legacy_upper_bound = month_start(max(datetime.utcnow(), latest_created_at or datetime.utcnow()), 1)
+    op.execute('ALTER TABLE events RENAME TO events_legacy')
+    # a partition primary key has to match the partitioned table one (id, created_at), ids stay unique thanks to the sequence
+    op.execute('ALTER TABLE events_legacy DROP CONSTRAINT events_pkey')
+    op.execute('ALTER TABLE events_legacy ADD CONSTRAINT events_legacy_pkey PRIMARY KEY (id, created_at)')
+    op.execute('ALTER INDEX ix_events_unprocessed_id RENAME TO events_legacy_unprocessed_id_idx')
+    op.execute('CREATE TABLE events (LIKE events_legacy INCLUDING DEFAULTS, PRIMARY KEY (id, created_at)) '
+               'PARTITION BY RANGE (created_at)')
+    op.execute('ALTER SEQUENCE events_id_seq OWNED BY events.id')
+    op.create_foreign_key('events_event_descriptor_id_fkey', 'events', 'event_descriptors', ['event_descriptor_id'], ['id'])
+    op.create_foreign_key('events_group_id_fkey', 'events', 'groups', ['group_id'], ['id'])
+    op.create_foreign_key('events_creator_id_fkey', 'events', 'users', ['creator_id'], ['id'])
+    # partitioned indexes, the matching events_legacy_unprocessed_id_idx is attached instead of rebuilt
+    op.create_index('ix_events_unprocessed_id', 'events', ['id'], unique=False,
+                    postgresql_where=sa.text('NOT is_processed'))
+    op.create_index('ix_events_expiration_date', 'events', ['expiration_date'], unique=False,
+                    postgresql_where=sa.text('expiration_date IS NOT NULL'))
+    op.execute(f"ALTER TABLE events ATTACH PARTITION events_legacy "
+               f"FOR VALUES FROM (MINVALUE) TO ('{legacy_upper_bound.isoformat(' ')}')")
+    op.execute('CREATE TABLE events_default PARTITION OF events DEFAULT')
+    for offset in range(PREMAKE_MONTHS):
+        lower_bound, upper_bound = month_start(legacy_upper_bound, offset), month_start(legacy_upper_bound, offset + 1)
+        op.execute(f"CREATE TABLE events_p{lower_bound:%Y%m} PARTITION OF events "
+                   f"FOR VALUES FROM ('{lower_bound.isoformat(' ')}') TO ('{upper_bound.isoformat(' ')}')")
+
+
+def downgrade():
+    op.execute('CREATE TABLE events_unpartitioned (LIKE events INCLUDING DEFAULTS)')
+    op.execute('INSERT INTO events_unpartitioned SELECT * FROM events')
+    op.execute('ALTER SEQUENCE events_id_seq OWNED BY events_unpartitioned.id')
+    # dropping the partitioned table drops its partitions (and detached ones are left alone)
+    op.drop_table('events')
+    op.execute('ALTER TABLE events_unpartitioned RENAME TO events')
+    op.create_primary_key('events_pkey', 'events', ['id'])
+    op.create_foreign_key('events_event_descriptor_id_fkey', 'events', 'event_descriptors', ['event_descriptor_id'], ['id'])
+    op.create_foreign_key('events_group_id_fkey', 'events', 'groups', ['group_id'], ['id'])
+    op.create_foreign_key('events_creator_id_fkey', 'events', 'users', ['creator_id'], ['id'])
+    op.create_index('ix_events_unprocessed_id', 'events', ['id'], unique=False,
+                    postgresql_where=sa.text('NOT is_processed'))
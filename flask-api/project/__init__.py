@@ -9,9 +9,9 @@ from flask_mail import Mail
 from twilio.rest import Client
 from celery import Celery
 from raven.contrib.flask import Sentry
-from pyfcm import FCMNotification
 from project.api.common.base_definitions import BaseFlask
-from project.extensions import db, migrate, bcrypt, mail
+from project.extensions import db, migrate, bcrypt, mail, token_cache, principal_cache, password_hasher, \
+    google_token_verifier, facebook_graph_client, push_sender, event_descriptor_catalog
 from project.models.user import User
 from project.models.event_descriptor import EventDescriptor
 from project.models.group import Group
@@ -27,7 +27,6 @@ conf.from_object(os.getenv('APP_SETTINGS'))
 
 sentry = None
 twilio_client = Client(conf['TWILIO_ACCOUNT_SID'], conf['TWILIO_AUTH_TOKEN'])
-push_service = FCMNotification(api_key=conf['FCM_SERVER_KEY'])
 
 def create_app():
     # instantiate the app
@@ -47,11 +46,13 @@ def create_app():
     from project.api.v1.devices import devices_blueprint
     from project.api.v1.phone_validation import phone_validation_blueprint
     from project.api.v1.email_validation import email_validation_blueprint
+    from project.api.v1.events import events_blueprint
     app.register_blueprint(auth_blueprint, url_prefix='/v1')
     app.register_blueprint(users_blueprint, url_prefix='/v1')
     app.register_blueprint(devices_blueprint, url_prefix='/v1')
     app.register_blueprint(phone_validation_blueprint, url_prefix='/v1')
     app.register_blueprint(email_validation_blueprint, url_prefix='/v1')
+    app.register_blueprint(events_blueprint, url_prefix='/v1')
 
     # register error handlers
     from project.api.common.utils import exceptions
@@ -62,6 +63,7 @@ def create_app():
     app.register_error_handler(exceptions.ForbiddenException, error_handlers.handle_exception)
     app.register_error_handler(exceptions.NotFoundException, error_handlers.handle_exception)
     app.register_error_handler(exceptions.ServerErrorException, error_handlers.handle_exception)
+    app.register_error_handler(exceptions.ServiceUnavailableException, error_handlers.handle_exception)
     if not app.debug and not app.testing:
         app.register_error_handler(Exception, error_handlers.handle_general_exception)
     return app
@@ -71,12 +73,19 @@ def setup_extensions(app):
     bcrypt.init_app(app)
     migrate.init_app(app, db)
     mail.init_app(app)
+    token_cache.init_app(app)
+    principal_cache.init_app(app)
+    password_hasher.init_app(app)
+    google_token_verifier.init_app(app)
+    facebook_graph_client.init_app(app)
+    push_sender.init_app(app)
+    event_descriptor_catalog.init_app(app)
 
 # noinspection PyPropertyAccess
 def make_celery(app):
     app = app or create_app()
     celery = Celery(__name__, broker=app.config['CELERY_BROKER_URL'], include=['project.tasks.mail_tasks', 'project.tasks.push_notification_tasks',
-                    'project.tasks.twilio_tasks'], backend=app.config['CELERY_RESULT_BACKEND'])
+                    'project.tasks.twilio_tasks', 'project.tasks.event_tasks'], backend=app.config['CELERY_RESULT_BACKEND'])
     celery.conf.update(app.config)
     TaskBase = celery.Task
     class ContextTask(TaskBase):
@@ -1,25 +1,66 @@
 # project/api/common/utils/decorators.py
 
-from flask import request
+from flask import request, g, current_app
 from functools import wraps
+from typing import Optional
 from project.api.common.utils.exceptions import UnauthorizedException, ForbiddenException
+from project.api.common.utils.principal_cache import Principal
 from project.models.user import User, UserRole
+from project.extensions import token_cache, principal_cache
+
+
+def load_principal(user_id: int) -> Optional[Principal]:
+    """Returns the request principal, served from the principal cache when possible"""
+    principal = g.get('principal')
+    if principal is not None and principal.id == user_id:
+        return principal
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        version = principal_cache.version(user_id)
+        user = User.get(user_id)
+        if not user:
+            return None
+        g.logged_user = user
+        principal = Principal.from_user(user)
+        principal_cache.set(principal, version)
+    g.principal = principal
+    return principal
+
+
+def get_logged_user() -> User:
+    """Returns the authenticated user, loading it at most once per request"""
+    if 'logged_user' not in g:
+        g.logged_user = User.get(g.principal.id)
+        if not g.logged_user:
+            raise UnauthorizedException(message='Something went wrong. Please contact us.')
+    return g.logged_user
 
 
 def privileges(roles):
     def actual_decorator(f):
         @wraps(f)
         def decorated_function(logged_user_id, *args, **kwargs):
-            user = User.get(logged_user_id)
-            if not user or not user.active:
+            principal = load_principal(logged_user_id)
+            if not principal or not principal.active:
                 raise UnauthorizedException(message='Something went wrong. Please contact us.')
-            user_roles = UserRole(user.roles)
+            user_roles = UserRole(principal.roles)
             if not bool(user_roles & roles):
                 raise ForbiddenException()
             return f(logged_user_id, *args, **kwargs)
         return decorated_function
     return actual_decorator
 
+
+def get_logged_user_fields(*fields: str):
+    """Returns the authenticated user if already loaded in this request, otherwise a row with just the given columns"""
+    if 'logged_user' in g:
+        return g.logged_user
+    row = User.get_fields(g.principal.id, *fields)
+    if not row:
+        raise UnauthorizedException(message='Something went wrong. Please contact us.')
+    return row
+
+
 def authenticate(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -27,9 +68,18 @@ def authenticate(f):
         if not auth_header:
             raise UnauthorizedException()
         auth_token = auth_header.split(" ")[1]
-        user_id = User.decode_auth_token(auth_token)
-        user = User.get(user_id)
-        if not user or not user.active:
+        # g may outlive a single request (e.g. an already pushed app context), never reuse a stale principal
+        g.pop('principal', None)
+        g.pop('logged_user', None)
+        payload = token_cache.get_or_decode(auth_token, User.decode_auth_token_payload)
+        user_id = payload['sub']
+        if current_app.config.get('STATELESS_AUTH') and 'roles' in payload:
+            # stateless mode, authorization is decided from the access token claims alone
+            principal = Principal(id=user_id, active=payload['active'], roles=payload['roles'])
+            g.principal = principal
+        else:
+            principal = load_principal(user_id)
+        if not principal or not principal.active:
             raise UnauthorizedException(message='Something went wrong. Please contact us.')
         return f(user_id, *args, **kwargs)
     return decorated_function
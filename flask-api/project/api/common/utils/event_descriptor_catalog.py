@@ -0,0 +1,112 @@
+# project/api/common/utils/event_descriptor_catalog.py
+
+import re
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+
+_PLACEHOLDER_RE = re.compile(r'\{([123])\}')
+
+
+class MessageTemplate:
+    """Event descriptor description split once into its literal parts and {1}, {2}, {3} entity placeholders.
+
+    Placeholders without value are kept as is, like the former str.replace based rendering did.
+    """
+    __slots__ = ('literals', 'placeholders')
+
+    def __init__(self, template: str):
+        pieces = _PLACEHOLDER_RE.split(template)
+        self.literals = tuple(pieces[0::2])
+        self.placeholders = tuple(int(index) for index in pieces[1::2])
+
+    def render(self, *values: Optional[str]) -> str:
+        parts = [self.literals[0]]
+        for index, literal in zip(self.placeholders, self.literals[1:]):
+            value = values[index - 1] if index <= len(values) else None
+            parts.append(value or f'{{{index}}}')
+            parts.append(literal)
+        return ''.join(parts)
+
+
+class CachedEventDescriptor(NamedTuple):
+    id: int
+    name: str
+    template: MessageTemplate
+
+
+class EventDescriptorCatalog:
+    """In process cache of the (small and nearly static) event descriptor catalog with precompiled message templates.
+
+    The whole catalog is loaded at once and stamped with a version (descriptors count and latest updated_at).
+    Descriptor writes committed through this process drop the cache right away; writes done by other processes
+    are picked up when the version, rechecked at most every `EVENT_DESCRIPTOR_CACHE_TTL_SECONDS`, changes.
+    """
+
+    _PENDING_KEY = 'event_descriptor_catalog_pending'
+
+    def __init__(self):
+        self.ttl = 60
+        self.version = None
+        self.load_count = 0
+        self._descriptors = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get('EVENT_DESCRIPTOR_CACHE_TTL_SECONDS', self.ttl)
+        self.clear()
+
+        from project.models.event_descriptor import EventDescriptor
+        if not event.contains(EventDescriptor, 'after_insert', self._on_descriptor_write):
+            for identifier in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(EventDescriptor, identifier, self._on_descriptor_write)
+            event.listen(Session, 'after_commit', self._on_commit)
+
+    def clear(self):
+        with self._lock:
+            self._descriptors = None
+            self.version = None
+            self._checked_at = 0
+
+    @staticmethod
+    def _current_version() -> Tuple:
+        from project.models.event_descriptor import EventDescriptor
+        return tuple(EventDescriptor.query.with_entities(func.count(EventDescriptor.id), func.max(EventDescriptor.updated_at)).one())
+
+    def _load(self):
+        from project.models.event_descriptor import EventDescriptor
+        version = self._current_version()
+        rows = EventDescriptor.query.with_entities(EventDescriptor.id, EventDescriptor.name, EventDescriptor.description).all()
+        self._descriptors = {id: CachedEventDescriptor(id=id, name=name, template=MessageTemplate(description))
+                             for id, name, description in rows}
+        self.version = version
+        self.load_count += 1
+
+    def _descriptors_map(self) -> Dict[int, CachedEventDescriptor]:
+        descriptors = self._descriptors
+        if descriptors is not None and time.monotonic() - self._checked_at < self.ttl:
+            return descriptors
+        with self._lock:
+            now = time.monotonic()
+            if self._descriptors is None:
+                self._load()
+            elif now - self._checked_at >= self.ttl and self._current_version() != self.version:
+                self._load()
+            self._checked_at = now
+            return self._descriptors
+
+    def get(self, descriptor_id: int) -> Optional[CachedEventDescriptor]:
+        return self._descriptors_map().get(descriptor_id)
+
+    def _on_descriptor_write(self, mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info[self._PENDING_KEY] = True
+
+    def _on_commit(self, session):
+        if session.info.pop(self._PENDING_KEY, False):
+            self.clear()
@@ -0,0 +1,113 @@
+# project/api/common/utils/event_partitions.py
+
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+_BOUNDS_RE = re.compile(r"FROM \((.+)\) TO \((.+)\)")
+
+
+class EventPartition(NamedTuple):
+    name: str
+    lower_bound: Optional[datetime]  # None for MINVALUE and the default partition
+    upper_bound: Optional[datetime]  # None for MAXVALUE and the default partition
+    is_default: bool
+
+
+def month_start(moment: datetime, months: int = 0) -> datetime:
+    """First instant of the month of moment, moved by months"""
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(lower_bound: datetime) -> str:
+    return f'events_p{lower_bound:%Y%m}'
+
+
+def _parse_bound(bound: str) -> Optional[datetime]:
+    bound = bound.strip()
+    return None if bound in ('MINVALUE', 'MAXVALUE') else datetime.fromisoformat(bound.strip("'"))
+
+
+def list_event_partitions(connection: Connection) -> List[EventPartition]:
+    """Partitions of the events table with their created_at range"""
+    rows = connection.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'events'::regclass ORDER BY c.relname"
+    ))
+    partitions = []
+    for name, bounds in rows:
+        match = _BOUNDS_RE.search(bounds)
+        if match:
+            partitions.append(EventPartition(name, _parse_bound(match.group(1)), _parse_bound(match.group(2)), False))
+        else:
+            partitions.append(EventPartition(name, None, None, True))
+    return partitions
+
+
+def create_event_partitions(connection: Connection, months_ahead: int, now: datetime = None) -> List[str]:
+    """Creates the monthly partitions missing from the current month to months_ahead months later, returns their names.
+
+    A month already covered by another partition (like the one the pre partitioning rows were attached as) is skipped.
+    """
+    partitions = [partition for partition in list_event_partitions(connection) if not partition.is_default]
+    current_month = month_start(now or datetime.utcnow())
+    created = []
+    for offset in range(months_ahead + 1):
+        lower_bound, upper_bound = month_start(current_month, offset), month_start(current_month, offset + 1)
+        if any((partition.lower_bound is None or partition.lower_bound < upper_bound) and
+               (partition.upper_bound is None or partition.upper_bound > lower_bound) for partition in partitions):
+            continue
+        name = partition_name(lower_bound)
+        try:
+            with connection.begin_nested():
+                connection.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF events "
+                    f"FOR VALUES FROM ('{lower_bound.isoformat(' ')}') TO ('{upper_bound.isoformat(' ')}')"
+                ))
+        except DBAPIError:
+            # the default partition already holds rows of that month, they stay there until they expire
+            logger.warning(f'Could not create the {name} events partition', exc_info=True)
+            continue
+        created.append(name)
+    return created
+
+
+def _holds_unexpired_events(connection: Connection, name: str, now: datetime) -> bool:
+    return connection.execute(text(
+        f'SELECT EXISTS (SELECT 1 FROM {name} WHERE expiration_date IS NULL OR expiration_date >= :now)'
+    ), {'now': now}).scalar()
+
+
+def remove_expired_event_partitions(connection: Connection, retention_days: Optional[int] = None,
+                                    detach_only: bool = False, now: datetime = None) -> List[str]:
+    """Drops (or only detaches, leaving them as standalone tables) the past partitions whose events are all expired
+    (none with a NULL or future expiration_date), returns their names.
+
+    retention_days opts in a fixed window on top of that: the monthly partitions whose whole created_at range is older
+    than it are removed whatever the expiration_date of their events. It never applies to the partition holding the
+    pre partitioning rows (no lower bound), that history is only removed once all of it is expired.
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=retention_days) if retention_days is not None else None
+    removed = []
+    for partition in list_event_partitions(connection):
+        if partition.is_default or partition.upper_bound is None or partition.upper_bound > now:
+            continue
+        name = connection.dialect.identifier_preparer.quote(partition.name)
+        past_window = cutoff is not None and partition.lower_bound is not None and partition.upper_bound <= cutoff
+        if not past_window and _holds_unexpired_events(connection, name, now):
+            continue
+        if detach_only:
+            connection.execute(text(f'ALTER TABLE events DETACH PARTITION {name}'))
+        else:
+            connection.execute(text(f'DROP TABLE {name}'))
+        removed.append(partition.name)
+    return removed
@@ -44,3 +44,8 @@ class ServerErrorException(APIException):
 
     def __init__(self, message='Something went wrong.', payload=None):
         super().__init__(message=message, status_code=500, payload=payload)
+
+class ServiceUnavailableException(APIException):
+
+    def __init__(self, message='Service temporarily unavailable. Please try again.', payload=None):
+        super().__init__(message=message, status_code=503, payload=payload)
@@ -0,0 +1,31 @@
+# project/api/common/utils/exports.py
+
+from typing import Iterator
+
+import orjson
+from project.extensions import db
+from project.models.user import User
+
+USER_EXPORT_COLUMNS = (User.id, User.username, User.email, User.given_name, User.family_name,
+                       User.cellphone_cc, User.cellphone_number, User.active, User.roles,
+                       User.email_validation_date, User.cellphone_validation_date,
+                       User.created_at, User.updated_at)
+
+_NDJSON_OPTIONS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NAIVE_UTC
+
+
+def iter_users_ndjson(batch_size: int = 1000) -> Iterator[bytes]:
+    """Yields every user as NDJSON, one chunk of up to batch_size lines at a time.
+
+    Only the exported columns are selected (no ORM entities) and rows are fetched through a
+    server side cursor, so memory stays constant regardless of the users table size.
+    """
+    keys = [column.key for column in USER_EXPORT_COLUMNS]
+    result = db.session.execute(
+        db.select(*USER_EXPORT_COLUMNS).order_by(User.id).execution_options(yield_per=batch_size)
+    )
+    try:
+        for rows in result.partitions():
+            yield b''.join(orjson.dumps(dict(zip(keys, row)), option=_NDJSON_OPTIONS) for row in rows)
+    finally:
+        result.close()
@@ -0,0 +1,85 @@
+# project/api/common/utils/facebook.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from facepy import GraphAPI
+
+PROFILE_FIELDS = ('id', 'name', 'email', 'link')
+
+
+class FacebookGraphClient:
+    """Shared, time bounded Facebook Graph API client.
+
+    Every request goes through one keep-alive connection pool with strict timeouts and no retries,
+    and the `me` profile of a token is kept for a few seconds so mobile retry storms are absorbed
+    without calling Facebook again.
+    """
+
+    def __init__(self):
+        self.url = 'https://graph.facebook.com'
+        self.timeout = 5
+        self.cache_ttl = 60
+        self.cache_size = 10000
+        self.requests_count = 0
+        self._session = None
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.url = app.config.get('FACEBOOK_GRAPH_URL', self.url)
+        self.timeout = app.config.get('FACEBOOK_GRAPH_TIMEOUT_SECONDS', self.timeout)
+        self.cache_ttl = app.config.get('FACEBOOK_PROFILE_CACHE_TTL_SECONDS', self.cache_ttl)
+        pool_size = app.config.get('FACEBOOK_GRAPH_POOL_SIZE', 10)
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self._session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.clear()
+
+    @staticmethod
+    def _key(access_token: str) -> bytes:
+        return hashlib.sha256(access_token.encode()).digest()
+
+    def _cached_profile(self, key: bytes) -> Optional[dict]:
+        with self._lock:
+            entry = self._profiles.get(key)
+            if entry is None:
+                return None
+            profile, expires_at = entry
+            if expires_at <= time.time():
+                del self._profiles[key]
+                return None
+            return profile
+
+    def _cache_profile(self, key: bytes, profile: dict):
+        if self.cache_ttl <= 0:
+            return
+        with self._lock:
+            self._profiles[key] = (profile, time.time() + self.cache_ttl)
+            self._profiles.move_to_end(key)
+            while len(self._profiles) > self.cache_size:
+                self._profiles.popitem(last=False)
+
+    def get_profile(self, access_token: str) -> dict:
+        """Returns id, name, email and link of the access token owner"""
+        key = self._key(access_token)
+        profile = self._cached_profile(key)
+        if profile is not None:
+            return profile
+        graph = GraphAPI(access_token, url=self.url, timeout=self.timeout)
+        graph.session = self._session
+        self.requests_count += 1
+        response = graph.get('me', retry=0, fields=','.join(PROFILE_FIELDS))
+        profile = {field: response.get(field) for field in PROFILE_FIELDS}
+        self._cache_profile(key, profile)
+        return profile
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+            self.requests_count = 0
@@ -0,0 +1,87 @@
+# project/api/common/utils/google_auth.py
+
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from google.auth import exceptions, jwt
+
+GOOGLE_ISSUERS = ['accounts.google.com', 'https://accounts.google.com']
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+class GoogleTokenVerifier:
+    """Verifies Google ID tokens against a process wide cached copy of Google's signing certificates.
+
+    Certificates are fetched through a pooled http session and kept until the response
+    Cache-Control max-age (or Expires) is reached. Refreshes are single flight: concurrent
+    logins hitting an expired cache wait for one fetch instead of each fetching again.
+    """
+
+    def __init__(self):
+        self.certs_url = 'https://www.googleapis.com/oauth2/v1/certs'
+        self.timeout = 5
+        self.default_ttl = 300
+        self.min_refresh_interval = 60
+        self.fetch_count = 0
+        self._certs = None
+        self._fetched_at = 0
+        self._expires_at = 0
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.certs_url = app.config.get('GOOGLE_OAUTH2_CERTS_URL', self.certs_url)
+        self.timeout = app.config.get('GOOGLE_CERTS_TIMEOUT_SECONDS', self.timeout)
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._certs = None
+            self._fetched_at = 0
+            self._expires_at = 0
+            self.fetch_count = 0
+
+    def _ttl(self, response) -> float:
+        match = _MAX_AGE_RE.search(response.headers.get('Cache-Control', ''))
+        if match:
+            return int(match.group(1))
+        expires = response.headers.get('Expires')
+        if expires:
+            try:
+                return max(parsedate_to_datetime(expires).timestamp() - time.time(), 0)
+            except (TypeError, ValueError):
+                pass
+        return self.default_ttl
+
+    def get_certs(self, force_refresh: bool = False) -> dict:
+        """Returns the cached certificates, fetching them when expired (or when forced, at most once per minute)"""
+        if self._certs is not None and not force_refresh and self._expires_at > time.time():
+            return self._certs
+        with self._lock:
+            # another thread may have refreshed the certs while we were waiting for the lock
+            now = time.time()
+            if self._certs is not None and self._expires_at > now and \
+                    (not force_refresh or now - self._fetched_at < self.min_refresh_interval):
+                return self._certs
+            response = self._session.get(self.certs_url, timeout=self.timeout)
+            if response.status_code != 200:
+                raise exceptions.TransportError(f'Could not fetch certificates at {self.certs_url}')
+            self._certs = response.json()
+            self._fetched_at = now
+            self._expires_at = now + self._ttl(response)
+            self.fetch_count += 1
+            return self._certs
+
+    def verify(self, token: str, audience: str) -> dict:
+        """Verifies token signature, expiration, audience and issuer returning its claims"""
+        certs = self.get_certs()
+        if jwt.decode_header(token).get('kid') not in certs:
+            # google rotated its keys before our cached copy expired
+            certs = self.get_certs(force_refresh=True)
+        idinfo = jwt.decode(token, certs=certs, audience=audience)
+        if idinfo['iss'] not in GOOGLE_ISSUERS:
+            raise exceptions.GoogleAuthError(f'Wrong issuer. \'iss\' should be one of the following: {GOOGLE_ISSUERS}')
+        return idinfo
@@ -0,0 +1,78 @@
+# project/api/common/utils/hashing.py
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+from flask import current_app
+from project.api.common.utils.exceptions import ServiceUnavailableException
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing on a dedicated, bounded process pool so a login burst can not pin every request worker.
+
+    At most `HASHING_MAX_PENDING` hashing jobs are accepted per api process (running plus queued),
+    further ones are rejected right away with a 503 instead of queueing behind a login storm. It has
+    to stay below the request threads of the process, otherwise the limit can never be reached.
+    A `HASHING_POOL_SIZE` of 0 hashes inline (used by development and testing configs).
+
+    The pool processes are started by a forkserver, never forked from a multi threaded api worker
+    whose other threads may hold locks, and only run bcrypt functions so they never import the app.
+    """
+
+    def __init__(self):
+        self.pool_size = 0
+        self.max_pending = 0
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.pool_size = app.config.get('HASHING_POOL_SIZE', 0)
+        self.max_pending = app.config.get('HASHING_MAX_PENDING', self.pool_size * 4)
+        self.shutdown()
+        self._slots = threading.BoundedSemaphore(self.max_pending) if self.pool_size else None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # created lazily so every (forked) gunicorn worker gets its own pool
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.pool_size,
+                                                         mp_context=multiprocessing.get_context('forkserver'))
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self.pool_size:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise ServiceUnavailableException()
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def generate_password_hash(self, password: str, rounds: int = None) -> str:
+        rounds = rounds or current_app.config.get('BCRYPT_LOG_ROUNDS')
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+    def check_password_hash(self, pw_hash: str, password: str) -> bool:
+        if not pw_hash:
+            return False
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), pw_hash.encode('utf-8'))
+
+    @staticmethod
+    def hash_rounds(pw_hash: str) -> int:
+        """Cost factor a bcrypt hash ($2b$<rounds>$<salt+hash>) was generated with"""
+        return int(pw_hash.split('$')[2])
+
+    def needs_rehash(self, pw_hash: str) -> bool:
+        """True if pw_hash was generated with a cost factor other than the configured one"""
+        return self.hash_rounds(pw_hash) != current_app.config.get('BCRYPT_LOG_ROUNDS')
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -1,14 +1,42 @@
 # project/api/common/utils/helpers.py
 
+import base64
+import binascii
 from contextlib import contextmanager
-from project.api.common.utils.exceptions import ServerErrorException
+from datetime import datetime
+from typing import Tuple
+
+import orjson
+from sqlalchemy.orm import scoped_session
+from project.api.common.utils.exceptions import ServerErrorException, InvalidPayload
 
 @contextmanager
-def session_scope(session):
-    """Provide a transactional scope around a series of operations."""
+def session_scope(session, expire_on_commit: bool = True):
+    """Provide a transactional scope around a series of operations.
+    expire_on_commit=False keeps the loaded state after commit, avoiding a reload when the
+    objects are read again."""
+    target = session() if isinstance(session, scoped_session) else session
+    previous_expire_on_commit = target.expire_on_commit
+    target.expire_on_commit = expire_on_commit
     try:
         yield session
         session.commit()
     except:
         session.rollback()
         raise ServerErrorException()
+    finally:
+        target.expire_on_commit = previous_expire_on_commit
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Opaque keyset pagination cursor pointing after the (created_at, id) row"""
+    return base64.urlsafe_b64encode(orjson.dumps([created_at.isoformat(), id])).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decodes a cursor generated by encode_cursor"""
+    try:
+        created_at, id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise InvalidPayload(message='Invalid cursor.')
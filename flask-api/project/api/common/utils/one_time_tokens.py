@@ -0,0 +1,33 @@
+# project/api/common/utils/one_time_tokens.py
+
+import hashlib
+import hmac
+
+from flask import current_app
+from project.extensions import password_hasher
+
+DIGEST_PREFIX = 'hmac-sha256$'
+
+
+def token_digest(token: str) -> str:
+    """Keyed digest of a one time (password recovery, email verification) token to be stored in db.
+
+    The tokens are already signed JWTs so a fast keyed digest is enough, there is nothing to brute force.
+    """
+    key = current_app.config.get('SECRET_KEY').encode('utf-8')
+    return DIGEST_PREFIX + hmac.new(key, token.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def is_legacy_digest(stored_digest: str) -> bool:
+    """True for token hashes stored with bcrypt before keyed digests were introduced"""
+    return bool(stored_digest) and not stored_digest.startswith(DIGEST_PREFIX)
+
+
+def verify_token(token: str, stored_digest: str) -> bool:
+    """Constant time comparison of token against its stored digest (legacy bcrypt hashes are still accepted)"""
+    if not stored_digest:
+        return False
+    if is_legacy_digest(stored_digest):
+        # bcrypt only ever hashed the first 72 bytes of the (ascii) token
+        return password_hasher.check_password_hash(stored_digest, token[:72])
+    return hmac.compare_digest(token_digest(token), stored_digest)
@@ -0,0 +1,141 @@
+# project/api/common/utils/principal_cache.py
+
+import logging
+from typing import NamedTuple, Optional
+
+import redis
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+logger = logging.getLogger(__name__)
+
+
+class Principal(NamedTuple):
+    """Authorization relevant fields of a user"""
+    id: int
+    active: bool
+    roles: int
+
+    @staticmethod
+    def from_user(user) -> 'Principal':
+        return Principal(id=user.id, active=user.active, roles=user.roles)
+
+
+class PrincipalCache:
+    """Redis backed cache of user principals (active flag and roles) shared by every api node.
+
+    Entries are invalidated whenever a User row changing `active` or `roles` is updated or
+    deleted. Invalidating also bumps a per user version, entries are stored along with the version
+    read before loading the user and served only while it is still the current one, so a reader
+    that loaded the user before a commit can not cache the stale row past its invalidation.
+    A cache without redis url configured (or a redis failure) falls back to the db.
+    """
+
+    KEY_PREFIX = 'principal:'
+    VERSION_KEY_PREFIX = 'principal:version:'
+    _PENDING_KEY = 'principal_cache_pending'
+
+    def __init__(self):
+        self.redis = None
+        self.ttl = 300
+
+    def init_app(self, app):
+        url = app.config.get('PRINCIPAL_CACHE_REDIS_URL')
+        self.ttl = app.config.get('PRINCIPAL_CACHE_TTL_SECONDS', self.ttl)
+        self.redis = redis.Redis.from_url(url, socket_timeout=0.1, socket_connect_timeout=0.1) if url else None
+
+        from project.models.user import User
+        if not event.contains(User, 'after_update', self._on_user_write):
+            event.listen(User, 'after_update', self._on_user_write)
+            event.listen(User, 'after_delete', self._on_user_delete)
+            event.listen(Session, 'after_commit', self._on_commit)
+            event.listen(Session, 'after_soft_rollback', self._on_rollback)
+
+    def _key(self, user_id: int) -> str:
+        return f'{self.KEY_PREFIX}{user_id}'
+
+    def _version_key(self, user_id: int) -> str:
+        return f'{self.VERSION_KEY_PREFIX}{user_id}'
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        if self.redis is None:
+            return None
+        try:
+            value, version = self.redis.mget(self._key(user_id), self._version_key(user_id))
+        except redis.RedisError:
+            logger.warning('Principal cache unavailable', exc_info=True)
+            return None
+        if value is None:
+            return None
+        cached_version, active, roles = value.split(b':')
+        if int(cached_version) != int(version or 0):
+            return None
+        return Principal(id=user_id, active=active == b'1', roles=int(roles))
+
+    def version(self, user_id: int) -> Optional[int]:
+        """Current version of the user entry, to be read before loading the user the entry is set from"""
+        if self.redis is None:
+            return None
+        try:
+            return int(self.redis.get(self._version_key(user_id)) or 0)
+        except redis.RedisError:
+            logger.warning('Principal cache unavailable', exc_info=True)
+            return None
+
+    def set(self, principal: Principal, version: Optional[int]):
+        if self.redis is None or version is None:
+            return
+        try:
+            self.redis.setex(self._key(principal.id), self.ttl, f'{version}:{int(principal.active)}:{principal.roles}')
+        except redis.RedisError:
+            logger.warning('Principal cache unavailable', exc_info=True)
+
+    def invalidate(self, *user_ids: int):
+        if self.redis is None or not user_ids:
+            return
+        try:
+            with self.redis.pipeline() as pipeline:
+                pipeline.delete(*[self._key(user_id) for user_id in user_ids])
+                for user_id in user_ids:
+                    # outlives any entry set before the bump, an expired version can not revive a stale one
+                    pipeline.incr(self._version_key(user_id))
+                    pipeline.expire(self._version_key(user_id), 2 * self.ttl)
+                pipeline.execute()
+        except redis.RedisError:
+            logger.warning('Principal cache unavailable', exc_info=True)
+
+    def clear(self):
+        if self.redis is None:
+            return
+        try:
+            keys = list(self.redis.scan_iter(match=f'{self.KEY_PREFIX}*'))
+            if keys:
+                self.redis.delete(*keys)
+        except redis.RedisError:
+            logger.warning('Principal cache unavailable', exc_info=True)
+
+    def _schedule_invalidation(self, target):
+        # invalidate right away and once again after commit, so a concurrent request can not
+        # re-populate the cache with the not yet committed row
+        self.invalidate(target.id)
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(self._PENDING_KEY, set()).add(target.id)
+
+    def _on_user_write(self, mapper, connection, target):
+        state = inspect(target)
+        if state.attrs.active.history.has_changes() or state.attrs.roles.history.has_changes():
+            self._schedule_invalidation(target)
+
+    def _on_user_delete(self, mapper, connection, target):
+        self._schedule_invalidation(target)
+
+    def _on_commit(self, session):
+        pending = session.info.pop(self._PENDING_KEY, None)
+        if pending:
+            self.invalidate(*pending)
+
+    def _on_rollback(self, session, previous_transaction):
+        # the rolled back writes never happened, their invalidations must not wait for an unrelated commit
+        if previous_transaction.parent is None:
+            session.info.pop(self._PENDING_KEY, None)
@@ -1,22 +1,16 @@
 # project/api/common/utils/push_notifications.py
 
-from project import app
-from project.extensions import db
 from project.models.event import Event
 from project.models.user import User
 from project.models.device import Device
-from project.tasks.push_notification_tasks import send_async_push_notifications
+from project.tasks.push_notification_tasks import send_async_push_notifications, send_event_push_notifications
 
 
 def send_notifications_for_event(event: Event):
-    message_title, message_body, pn_tokens = event.push_notification_data()
-    event.is_processed = True
-    db.session.commit()
-    app.logger.info(pn_tokens)
-    send_async_push_notifications.delay(message_title=message_title, message_body=message_body, pn_tokens=pn_tokens)
+    """Queues the event push notifications, the (already committed) event audience is resolved by the worker"""
+    send_event_push_notifications.delay(event_id=event.id)
 
 
 def send_notification_to_user(user: User, message_title: str, message_body: str):
-    active_devices = Device.query_active_devices_for_user(user).all()
-    pn_tokens = [device.pn_token for device in active_devices]
+    pn_tokens = [pn_token for pn_token, in Device.query_active_devices_for_user(user).with_entities(Device.pn_token)]
     send_async_push_notifications.delay(message_title=message_title, message_body=message_body, pn_tokens=pn_tokens)
@@ -0,0 +1,90 @@
+# project/api/common/utils/push_sender.py
+
+import asyncio
+import logging
+import os
+import threading
+from typing import List, Optional
+
+import aiohttp
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPushSender:
+    """Sends FCM multicast requests concurrently over a pooled keep-alive aiohttp session.
+
+    Every worker process lazily creates (after the prefork) its own event loop and connection pool,
+    so a task pushing several batches waits for the slowest request instead of for their sum.
+    In flight requests are bounded by `PUSH_SENDER_CONCURRENCY` and each one by `PUSH_SENDER_TIMEOUT_SECONDS`.
+    """
+
+    def __init__(self):
+        self.endpoint = 'https://fcm.googleapis.com/fcm/send'
+        self.server_key = None
+        self.concurrency = 16
+        self.timeout = 5
+        self._loop = None
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.endpoint = app.config.get('FCM_ENDPOINT', self.endpoint)
+        self.server_key = app.config.get('FCM_SERVER_KEY')
+        self.concurrency = app.config.get('PUSH_SENDER_CONCURRENCY', self.concurrency)
+        self.timeout = app.config.get('PUSH_SENDER_TIMEOUT_SECONDS', self.timeout)
+        self.close()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        if self._pid != os.getpid():
+            # loop and sockets inherited from the parent process can not be reused
+            self._loop, self._session = None, None
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._pid = os.getpid()
+        return self._loop
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Authorization': f'key={self.server_key}', 'Content-Type': 'application/json'}
+            )
+        return self._session
+
+    async def _post(self, semaphore: asyncio.Semaphore, payload: dict) -> Optional[dict]:
+        async with semaphore:
+            try:
+                async with self._get_session().post(self.endpoint, data=orjson.dumps(payload)) as response:
+                    if response.status != 200:
+                        logger.warning('Push provider answered %s', response.status)
+                        return None
+                    return orjson.loads(await response.read())
+            except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError):
+                logger.warning('Push request failed', exc_info=True)
+                return None
+
+    async def _send(self, payloads: List[dict]) -> List[Optional[dict]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self._post(semaphore, payload) for payload in payloads))
+
+    def send_multicast(self, batches: List[List[str]], message_title: str, message_body: str) -> List[Optional[dict]]:
+        """Sends one multicast request per pn_token batch, all of them concurrently.
+
+        Returns the FCM responses in batch order, None for the batches that failed or timed out.
+        """
+        payloads = [{'registration_ids': batch, 'notification': {'title': message_title, 'body': message_body}}
+                    for batch in batches]
+        with self._lock:
+            return self._get_loop().run_until_complete(self._send(payloads))
+
+    def close(self):
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                if self._session is not None:
+                    self._loop.run_until_complete(self._session.close())
+                self._loop.close()
+            self._loop, self._session = None, None
@@ -0,0 +1,73 @@
+# project/api/common/utils/token_cache.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class VerifiedTokenCache:
+    """Bounded in-process cache of already verified auth tokens.
+
+    Entries are keyed by a sha256 digest of the token (never the token itself) and
+    are evicted once the token `exp` is reached or when the cache is full (LRU).
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('AUTH_TOKEN_CACHE_SIZE', self.maxsize)
+        self.clear()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """Returns the cached token payload if it is cached and not expired"""
+        key = self._key(token)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                if payload['exp'] > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, token: str, payload: dict):
+        if self.maxsize <= 0 or payload['exp'] <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_decode(self, token: str, decode: Callable[[str], dict]) -> dict:
+        """Returns the token payload, decoding (and caching) the token on a miss"""
+        payload = self.get(token)
+        if payload is not None:
+            return payload
+        payload = decode(token)
+        self.set(token, payload)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
@@ -2,25 +2,31 @@
 
 from flask import Blueprint, request, current_app, render_template
 from sqlalchemy import  or_
-from facepy import GraphAPI
 from flask_accept import accept
 from datetime import datetime
-from google.oauth2 import id_token
-from google.auth.transport import requests
 
-from project.extensions import bcrypt, db
+from project.extensions import password_hasher, db, google_token_verifier, facebook_graph_client
 from project.api.common.utils.exceptions import InvalidPayload, BusinessException, NotFoundException, UnauthorizedException
-from project.api.common.utils.decorators import authenticate, privileges
+from project.api.common.utils.decorators import authenticate, privileges, get_logged_user, get_logged_user_fields
 from project.models.user import User, UserRole
 from project.models.device import  Device
 from project.api.common.utils.constants import Constants
 from project.api.common.utils.helpers import session_scope
+from project.api.common.utils.one_time_tokens import token_digest, verify_token
 
 
 
 auth_blueprint = Blueprint('auth', __name__)
 
 
+def auth_tokens(user: User) -> dict:
+    """Returns the tokens handed to a logged in user"""
+    tokens = {'auth_token': user.encode_auth_token()}
+    if current_app.config.get('STATELESS_AUTH'):
+        tokens['refresh_token'] = user.encode_refresh_token()
+    return tokens
+
+
 @auth_blueprint.route('/auth/register', methods=['POST'])
 @accept('application/json')
 def register_user():
@@ -35,32 +41,30 @@ def register_user():
     # check for existing user
     user = User.first(User.email == email)
     if not user:
-        # add new user to db
+        # add new user to db, everything is done in a single transaction
         new_user = User(email=email, password=password)
-        with session_scope(db.session) as session:
+        with session_scope(db.session, expire_on_commit=False) as session:
             session.add(new_user)
-
-        # need another scope if not new_user does not exists yet
-        with session_scope(db.session) as session:
+            session.flush()  # assigns new_user.id needed by the tokens
             token = new_user.encode_email_token()
-            new_user.email_token_hash = bcrypt.generate_password_hash(token, current_app.config.get('BCRYPT_LOG_ROUNDS')).decode()
+            new_user.email_token_hash = token_digest(token)
+
+            # save the device
+            if all(x in request.headers for x in [Constants.HttpHeaders.DEVICE_ID, Constants.HttpHeaders.DEVICE_TYPE]):
+                device_id = request.headers.get(Constants.HttpHeaders.DEVICE_ID)
+                device_type = request.headers.get(Constants.HttpHeaders.DEVICE_TYPE)
+                Device.create_or_update(device_id=device_id, device_type=device_type, user=new_user)
 
         if not current_app.testing:
             from project.api.common.utils.mails import send_registration_email
             send_registration_email(new_user, token)
 
-        # save the device
-        if all(x in request.headers for x in [Constants.HttpHeaders.DEVICE_ID, Constants.HttpHeaders.DEVICE_TYPE]):
-            device_id = request.headers.get(Constants.HttpHeaders.DEVICE_ID)
-            device_type = request.headers.get(Constants.HttpHeaders.DEVICE_TYPE)
-            with session_scope(db.session):
-                Device.create_or_update(device_id=device_id, device_type=device_type, user=user)
         # generate auth token
-        auth_token = new_user.encode_auth_token()
+        tokens = auth_tokens(new_user)
         return {
             'status': 'success',
             'message': 'Successfully registered.',
-            'auth_token': auth_token,
+            **tokens,
             'email': new_user.email
         }, 201
     else:
@@ -92,18 +96,22 @@ def login_user():
         raise InvalidPayload()
 
     user = User.first_by(email=email)
-    if user and bcrypt.check_password_hash(user.password, password):
+    if user and password_hasher.check_password_hash(user.password, password):
+        # transparently upgrade/downgrade the stored hash to the configured bcrypt cost
+        if password_hasher.needs_rehash(user.password):
+            with session_scope(db.session):
+                user.password = password_hasher.generate_password_hash(password)
         # register device if needed
         if all(x in request.headers for x in [Constants.HttpHeaders.DEVICE_ID, Constants.HttpHeaders.DEVICE_TYPE]):
             device_id = request.headers.get(Constants.HttpHeaders.DEVICE_ID)
             device_type = request.headers.get(Constants.HttpHeaders.DEVICE_TYPE)
             with session_scope(db.session):
                 Device.create_or_update(device_id=device_id, device_type=device_type, user=user)
-        auth_token = user.encode_auth_token()
+        tokens = auth_tokens(user)
         return {
             'status': 'success',
             'message': 'Successfully logged in.',
-            'auth_token': auth_token,
+            **tokens,
             'email': user.email,
             'username': user.username,
             'given_name': user.given_name,
@@ -137,11 +145,35 @@ def logout_user(_):
     }
 
 
+@auth_blueprint.route('/auth/refresh', methods=['POST'])
+@accept('application/json')
+def refresh_token():
+    ''' exchanges a valid refresh token for a new pair of auth and refresh tokens'''
+    post_data = request.get_json()
+    if not post_data:
+        raise InvalidPayload()
+    token = post_data.get('refresh_token')
+    if not token:
+        raise InvalidPayload()
+
+    payload = User.decode_refresh_token(token)
+    user = User.get(payload['sub'])
+    if not user or not user.active or payload.get('ver') != (user.token_version or 0):
+        raise UnauthorizedException(message='Invalid token. Please log in again.')
+    return {
+        'status': 'success',
+        'message': 'Successfully refreshed token.',
+        'auth_token': user.encode_auth_token(),
+        'refresh_token': user.encode_refresh_token()
+    }
+
+
 @auth_blueprint.route('/auth/status', methods=['GET'])
 @accept('application/json')
 @authenticate
 def get_user_status(user_id: int):
-    user = User.get(user_id)
+    user = get_logged_user_fields('id', 'email', 'username', 'given_name', 'family_name', 'active',
+                                  'email_validation_date', 'cellphone_validation_date', 'created_at')
     return {
         'status': 'success',
         'data': {
@@ -174,7 +206,7 @@ def password_recovery():
     if user:
         token = user.encode_password_token()
         with session_scope(db.session):
-            user.token_hash = bcrypt.generate_password_hash(token, current_app.config.get('BCRYPT_LOG_ROUNDS')).decode()
+            user.token_hash = token_digest(token)
         if not current_app.testing:
             from project.api.common.utils.mails import send_password_recovery_email
             send_password_recovery_email(user, token)  # send recovery email
@@ -202,11 +234,12 @@ def password_reset():
 
     user_id = User.decode_password_token(token)
     user = User.get(user_id)
-    if not user or not user.token_hash or not bcrypt.check_password_hash(user.token_hash, token):
+    if not user or not verify_token(token, user.token_hash):
         raise NotFoundException(message='Invalid reset. Please try again.')
 
     with session_scope(db.session):
-        user.password = bcrypt.generate_password_hash(pw_new, current_app.config.get('BCRYPT_LOG_ROUNDS')).decode()
+        user.password = password_hasher.generate_password_hash(pw_new)
+        user.revoke_tokens()
         user.token_hash = None
     return {
         'status': 'success',
@@ -228,12 +261,13 @@ def password_change(user_id: int):
         raise InvalidPayload()
 
     # fetch the user data
-    user = User.get(user_id)
-    if not bcrypt.check_password_hash(user.password, pw_old):
+    user = get_logged_user()
+    if not password_hasher.check_password_hash(user.password, pw_old):
         raise BusinessException(message='Invalid password. Please try again.')
 
     with session_scope(db.session):
-        user.password = bcrypt.generate_password_hash(pw_new, current_app.config.get('BCRYPT_LOG_ROUNDS')).decode()
+        user.password = password_hasher.generate_password_hash(pw_new)
+        user.revoke_tokens()
     return {
         'status': 'success',
         'message': 'Successfully changed password.',
@@ -272,7 +306,7 @@ def google_login():
 
     try:
         # Specify the CLIENT_ID of the app that accesses the backend:
-        idinfo = id_token.verify_oauth2_token(credential, requests.Request(), current_app.config.get('GOOGLE_CLIENT_ID'))
+        idinfo = google_token_verifier.verify(credential, current_app.config.get('GOOGLE_CLIENT_ID'))
         google_id = idinfo['sub']
         google_email = idinfo['email']
         google_given_name = idinfo['given_name']
@@ -303,21 +337,21 @@ def google_login():
                 session.add(user)
                 code = 201
         # generate auth token
-        auth_token = user.encode_auth_token()
+        tokens = auth_tokens(user)
         return {
             'status': 'success',
             'message': 'Successfully google user registered.',
-            'auth_token': auth_token
+            **tokens
         }, code
     else:
-        auth_token = google_user.encode_auth_token()
+        tokens = auth_tokens(google_user)
         with session_scope(db.session):
             google_user.google_access_token = credential
             google_user.email_validation_date= datetime.utcnow() if google_email_verified else None
         return {
             'status': 'success',
             'message': 'Successfully facebook login.',
-            'auth_token': auth_token
+            **tokens
         }
     
 
@@ -334,8 +368,7 @@ def facebook_login():
     if not fb_access_token:
         raise InvalidPayload()
     try:
-        graph = GraphAPI(fb_access_token)
-        profile = graph.get("me?fields=id,name,email,link")
+        profile = facebook_graph_client.get_profile(fb_access_token)
     except Exception:
         raise UnauthorizedException()
 
@@ -356,20 +389,20 @@ def facebook_login():
                 session.add(user)
                 code = 201
         # generate auth token
-        auth_token = user.encode_auth_token()
+        tokens = auth_tokens(user)
         return {
             'status': 'success',
             'message': 'Successfully facebook registered.',
-            'auth_token': auth_token
+            **tokens
         }, code
     else:
-        auth_token = fb_user.encode_auth_token()
+        tokens = auth_tokens(fb_user)
         with session_scope(db.session):
             fb_user.fb_access_token = fb_access_token
         return {
             'status': 'success',
             'message': 'Successfully facebook login.',
-            'auth_token': auth_token
+            **tokens
         }
 
 
@@ -387,16 +420,15 @@ def set_standalone_user(user_id: int):
         raise InvalidPayload()
 
     # fetch the user data
-    user = User.get(user_id)
+    user = get_logged_user()
     if not user.fb_id:
         raise NotFoundException(message='Must be a facebook user login. Please try again.')
 
-    # fetch the user data
-    user = User.get(user_id)
-    if not bcrypt.check_password_hash(user.password, pw_old):
+    if not password_hasher.check_password_hash(user.password, pw_old):
         raise NotFoundException(message='Invalid password. Please try again.')
     with session_scope(db.session):
-        user.password = bcrypt.generate_password_hash(pw_new, current_app.config.get('BCRYPT_LOG_ROUNDS')).decode()
+        user.password = password_hasher.generate_password_hash(pw_new)
+        user.revoke_tokens()
     return {
         'status': 'success',
         'message': 'Successfully changed password.',
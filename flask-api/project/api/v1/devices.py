@@ -1,12 +1,12 @@
 # project/api/v1/devices.py
 
-from flask import Blueprint, request
+from flask import Blueprint, request, current_app
 from flask_accept import accept
 
 from project.api.common.utils.exceptions import InvalidPayload
 from project.models.device import Device
 from project.models.user import User
-from project.api.common.utils.decorators import authenticate
+from project.api.common.utils.decorators import authenticate, get_logged_user
 from project.api.common.utils.helpers import session_scope
 from project.extensions import db
 
@@ -32,11 +32,67 @@ def register_device():
     }
 
 
+def _is_string(value, max_length: int) -> bool:
+    return isinstance(value, str) and 0 < len(value) <= max_length
+
+
+def _invalid_device_item(item) -> bool:
+    """Whether a batch item is not a {device_id, device_type, pn_token} object fitting the devices columns"""
+    if not isinstance(item, dict):
+        return True
+    pn_token = item.get('pn_token')
+    return not _is_string(item.get('device_id'), 128) or not _is_string(item.get('device_type'), 128) or \
+        (pn_token is not None and not _is_string(pn_token, 256))
+
+
+@devices_blueprint.route('/devices/batch', methods=['POST'])
+@accept('application/json')
+def register_devices():
+    """Registers an array of {device_id, device_type, pn_token} devices in one upsert, reporting each item status"""
+    post_data = request.get_json()
+    if not isinstance(post_data, list) or not post_data or len(post_data) > current_app.config['DEVICES_BATCH_MAX_SIZE']:
+        raise InvalidPayload()
+    errors = []
+    devices = {}
+    pn_tokens = set()
+    for item in post_data:
+        device_id = item.get('device_id') if isinstance(item, dict) else None
+        if _invalid_device_item(item):
+            errors.append('Invalid payload.')
+        elif device_id in devices:
+            errors.append('Duplicated device_id.')
+        elif item.get('pn_token') in pn_tokens:
+            errors.append('Duplicated pn_token.')
+        else:
+            devices[device_id] = item
+            if item.get('pn_token'):
+                pn_tokens.add(item['pn_token'])
+            errors.append(None)
+    registered = {}
+    if devices:
+        with session_scope(db.session):
+            registered = Device.bulk_create_or_update(list(devices.values()))
+    results = []
+    for item, error in zip(post_data, errors):
+        device_id = item.get('device_id') if isinstance(item, dict) else None
+        if error is None and device_id not in registered:
+            error = 'Device could not be registered.'
+        if error:
+            results.append({'device_id': device_id, 'status': 'error', 'message': error})
+        else:
+            results.append({'device_id': device_id, 'status': 'success', 'message': 'Device successfully registered.'})
+    return {
+        'status': 'success',
+        'data': {
+            'devices': results
+        }
+    }
+
 @devices_blueprint.route('/devices/<device_id>', methods=['PUT'])
 @accept('application/json')
 @authenticate
 def connect_device_with_logged_in_user(user_id: int, device_id: str):
-    user = User.get(user_id)
+    user = get_logged_user()
     post_data = request.get_json()
     if not post_data:
         raise InvalidPayload()
@@ -4,11 +4,12 @@ from datetime import datetime
 from flask import Blueprint, request, current_app
 from flask_accept import accept
 
-from project.extensions import db, bcrypt
+from project.extensions import db
 from project.api.common.utils.exceptions import InvalidPayload, NotFoundException
 from project.api.common.utils.decorators import authenticate
 from project.models.user import User
 from project.api.common.utils.helpers import session_scope
+from project.api.common.utils.one_time_tokens import token_digest, verify_token
 
 
 
@@ -32,7 +33,7 @@ def email_verification(user_id):
     if user:
         token = user.encode_email_token()
         with session_scope(db.session):
-            user.email_token_hash = bcrypt.generate_password_hash(token, current_app.config.get('BCRYPT_LOG_ROUNDS')).decode()
+            user.email_token_hash = token_digest(token)
         if not current_app.testing:
             from project.api.common.utils.mails import send_email_verification_email
             send_email_verification_email(user, token)  # send recovery email
@@ -49,12 +50,12 @@ def verify_email(token):
     ''' creates a email_token_hash and sends email with token to user (assumes login=email), idempotent (could be use for resend)'''
     user_id = User.decode_email_token(token)
     user = User.get(user_id)
-    if not user or not user.email_token_hash:
+    if not user or not verify_token(token, user.email_token_hash):
         raise NotFoundException(message='Invalid verification. Please try again.')
-    bcrypt.check_password_hash(user.email_token_hash, token)
 
     with session_scope(db.session):
         user.email_validation_date = datetime.utcnow()
+        user.email_token_hash = None
     return {
         'status': 'success',
         'message': 'Successful email verification.',
@@ -0,0 +1,105 @@
+# project/api/v1/events.py
+
+from datetime import datetime, timezone
+
+from flask import Blueprint, request, current_app
+from flask_accept import accept
+
+from project.api.common.utils.decorators import authenticate, privileges
+from project.api.common.utils.exceptions import InvalidPayload
+from project.api.common.utils.helpers import session_scope
+from project.extensions import db, event_descriptor_catalog
+from project.models.event import Event
+from project.models.event_descriptor import EventDescriptor
+from project.models.group import Group
+from project.models.user import UserRole
+
+
+events_blueprint = Blueprint('events', __name__)
+
+ENTITY_PREFIXES = ('entity', 'entity_2', 'entity_3')
+MAX_STRING_LENGTH = 128
+
+
+def _is_id(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def _is_optional_string(value) -> bool:
+    return value is None or (isinstance(value, str) and len(value) <= MAX_STRING_LENGTH)
+
+
+def parse_event(item) -> dict:
+    """Event column values of a bulk ingestion item, raises ValueError describing the first invalid field"""
+    if not isinstance(item, dict):
+        raise ValueError('an object is expected')
+    event = {'event_descriptor_id': item.get('event_descriptor_id'), 'group_id': item.get('group_id')}
+    if not _is_id(event['event_descriptor_id']):
+        raise ValueError('invalid event_descriptor_id')
+    if not _is_id(event['group_id']):
+        raise ValueError('invalid group_id')
+    for prefix in ENTITY_PREFIXES:
+        entity_id = item.get(f'{prefix}_id')
+        if entity_id is not None and not _is_id(entity_id):
+            raise ValueError(f'invalid {prefix}_id')
+        event[f'{prefix}_id'] = entity_id
+        for field in (f'{prefix}_type', f'{prefix}_description'):
+            if not _is_optional_string(item.get(field)):
+                raise ValueError(f'invalid {field}')
+            event[field] = item.get(field)
+    expiration_date = item.get('expiration_date')
+    if expiration_date is not None:
+        try:
+            expiration_date = datetime.fromisoformat(expiration_date)
+        except (TypeError, ValueError):
+            raise ValueError('invalid expiration_date')
+        if expiration_date.tzinfo:
+            expiration_date = expiration_date.astimezone(timezone.utc).replace(tzinfo=None)
+    event['expiration_date'] = expiration_date
+    return event
+
+
+def _invalid_event(index: int, reason: str) -> InvalidPayload:
+    return InvalidPayload(message=f'Invalid event at index {index}: {reason}.', payload={'index': index})
+
+
+@events_blueprint.route('/events/batch', methods=['POST'])
+@accept('application/json')
+@authenticate
+@privileges(roles=UserRole.BACKEND_ADMIN)
+def ingest_events(user_id: int):
+    """Validates an array of events and inserts all of them or none, then queues their processing once"""
+    post_data = request.get_json()
+    if not isinstance(post_data, list) or not post_data or len(post_data) > current_app.config['EVENTS_BATCH_MAX_SIZE']:
+        raise InvalidPayload()
+    events = []
+    for index, item in enumerate(post_data):
+        try:
+            events.append(parse_event(item))
+        except ValueError as e:
+            raise _invalid_event(index, str(e))
+
+    # descriptors are validated against the cached catalog, only the ones it misses are looked up
+    descriptor_ids = {event['event_descriptor_id'] for event in events}
+    missed_ids = {id for id in descriptor_ids if not event_descriptor_catalog.get(id)}
+    if missed_ids:
+        missed_ids -= {id for id, in EventDescriptor.query.filter(EventDescriptor.id.in_(missed_ids)).with_entities(EventDescriptor.id)}
+    group_ids = {event['group_id'] for event in events}
+    unknown_group_ids = group_ids - {id for id, in Group.query.filter(Group.id.in_(group_ids)).with_entities(Group.id)}
+    for index, event in enumerate(events):
+        if event['event_descriptor_id'] in missed_ids:
+            raise _invalid_event(index, 'unknown event_descriptor_id')
+        if event['group_id'] in unknown_group_ids:
+            raise _invalid_event(index, 'unknown group_id')
+
+    from project.tasks.push_notification_tasks import process_pending_events
+    with session_scope(db.session):
+        count = Event.bulk_create(events, creator_id=user_id)
+    process_pending_events.delay()
+    return {
+        'status': 'success',
+        'message': f'{count} events were added!',
+        'data': {
+            'events': count
+        }
+    }, 201
@@ -6,7 +6,7 @@ from flask_accept import accept
 
 from project.extensions import db
 from project.api.common.utils.exceptions import InvalidPayload, BusinessException
-from project.api.common.utils.decorators import authenticate
+from project.api.common.utils.decorators import authenticate, get_logged_user
 from project.models.user import User
 from project.api.common.utils.helpers import session_scope
 
@@ -26,7 +26,7 @@ def register_user_cellphone(user_id: int):
     cellphone_cc = post_data.get('cellphone_cc')
     if not cellphone_number or not cellphone_cc:
         raise InvalidPayload()
-    user = User.get(user_id)
+    user = get_logged_user()
     if user.cellphone_validation_date and user.cellphone_number == cellphone_number and user.cellphone_cc == cellphone_cc:
         raise BusinessException(message='Registered. You have already registered this cellphone number.')
 
@@ -57,7 +57,7 @@ def verify_user_cellphone(user_id: int):
     if not post_data:
         raise InvalidPayload()
     validation_code = post_data.get('validation_code')
-    user = User.get(user_id)
+    user = get_logged_user()
 
     valid_code, message = user.verify_cellphone_validation_code(validation_code)
     if not valid_code:
@@ -1,13 +1,15 @@
 # project/api/v1/users.py
 
-from flask import Blueprint, request
-from sqlalchemy import exc, or_
+from flask import Blueprint, Response, request, current_app, stream_with_context
+from sqlalchemy import exc, or_, tuple_
 from flask_accept import accept
 
 from project.models.user import User, UserRole
 from project.extensions import db
-from project.api.common.utils.decorators import authenticate, privileges
+from project.api.common.utils.decorators import authenticate, privileges, get_logged_user
 from project.api.common.utils.exceptions import NotFoundException, BusinessException, InvalidPayload
+from project.api.common.utils.helpers import encode_cursor, decode_cursor
+from project.api.common.utils.exports import iter_users_ndjson
 
 
 users_blueprint = Blueprint('users', __name__, template_folder='../templates/users')
@@ -24,7 +26,7 @@ def ping_pong():
 @authenticate
 def push_echo(user_id: int):
     from project.api.common.utils.push_notification import send_notification_to_user
-    creator = User.get(user_id)
+    creator = get_logged_user()
     send_notification_to_user(user=creator, message_title="Auto Message", message_body="😄😄😄😄😄")
     return {
         'status': 'success',
@@ -80,16 +82,12 @@ def add_user(_):
 def get_single_user(_, user_id):
     """Get single user details"""
     try:
-        user = User.get(int(user_id))
+        user = User.get_fields(int(user_id), 'username', 'email', 'created_at')
         if not user:
             raise NotFoundException(message='User does not exist.')
         return {
             'status': 'success',
-            'data': {
-              'username': user.username,
-              'email': user.email,
-              'created_at': user.created_at
-            }
+            'data': user._asdict()
         }
     except ValueError:
         raise NotFoundException(message='User does not exist.')
@@ -100,17 +98,35 @@ def get_single_user(_, user_id):
 @authenticate
 @privileges(roles=UserRole.BACKEND_ADMIN)
 def get_all_users(_):
-    """Get all users"""
-    users = User.query.order_by(User.created_at.desc()).all()
-    users_list = [{
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'created_at': user.created_at
-        } for user in users]
+    """Get users, newest first, one keyset paginated page at a time"""
+    try:
+        limit = min(int(request.args.get('limit', current_app.config['ITEMS_PER_PAGE'])), current_app.config['MAX_ITEMS_PER_PAGE'])
+    except ValueError:
+        raise InvalidPayload()
+    if limit < 1:
+        raise InvalidPayload()
+    query = User.query_fields('id', 'username', 'email', 'created_at').order_by(User.created_at.desc(), User.id.desc())
+    cursor = request.args.get('cursor')
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        query = query.filter(tuple_(User.created_at, User.id) < tuple_(created_at, id))
+    # fetch one extra row to know whether there is a next page
+    users = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(users[limit - 1].created_at, users[limit - 1].id) if len(users) > limit else None
     return {
         'status': 'success',
         'data': {
-            'users': users_list
+            'users': [user._asdict() for user in users[:limit]],
+            'next_cursor': next_cursor
         }
     }
+
+
+@users_blueprint.route('/users/export', methods=['GET'])
+@accept('application/x-ndjson')
+@authenticate
+@privileges(roles=UserRole.BACKEND_ADMIN)
+def export_users(_):
+    """Streams every user as NDJSON"""
+    rows = iter_users_ndjson(batch_size=current_app.config['USER_EXPORT_BATCH_SIZE'])
+    return Response(stream_with_context(rows), mimetype='application/x-ndjson')
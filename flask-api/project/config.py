@@ -11,13 +11,21 @@ class BaseConfig:
     LOGGING_LEVEL = logging.DEBUG
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.environ.get('SECRET_KEY')
-    BCRYPT_LOG_ROUNDS = 13
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS') or 13)  # see `manage.py benchmark_bcrypt`
+    HASHING_POOL_SIZE = 2
+    # hashing jobs accepted per api process, below its request threads (gunicorn --threads) so a login burst is
+    # rejected with 503 while the other threads keep serving
+    HASHING_MAX_PENDING = max(1, int(os.environ.get('WEB_THREADS') or 4) - 1)
     TOKEN_EXPIRATION_DAYS = 30
     TOKEN_EXPIRATION_SECONDS = 0
     TOKEN_PASSWORD_EXPIRATION_DAYS = 1
     TOKEN_PASSWORD_EXPIRATION_SECONDS = 0
     TOKEN_EMAIL_EXPIRATION_DAYS = 1
     TOKEN_EMAIL_EXPIRATION_SECONDS = 0
+    AUTH_TOKEN_CACHE_SIZE = 10000
+    STATELESS_AUTH = (os.environ.get('STATELESS_AUTH') or 'false').lower() == 'true'
+    ACCESS_TOKEN_EXPIRATION_SECONDS = 900
+    PRINCIPAL_CACHE_TTL_SECONDS = 300
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND')
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = os.environ.get('MAIL_PORT')
@@ -32,16 +40,51 @@ class BaseConfig:
     CELLPHONE_VALIDATION_CODE_EXP_SECS = os.environ.get('CELLPHONE_VALIDATION_CODE_EXP_SECS') or 600
     SENTRY_DSN = 'Sentry_DNS'
     FCM_SERVER_KEY = os.environ.get('FCM_SERVER_KEY')
+    FCM_ENDPOINT = os.environ.get('FCM_ENDPOINT') or 'https://fcm.googleapis.com/fcm/send'
+    PUSH_SENDER_CONCURRENCY = 16
+    PUSH_SENDER_TIMEOUT_SECONDS = 5
     ITEMS_PER_PAGE = 20
+    MAX_ITEMS_PER_PAGE = 100
+    USER_EXPORT_BATCH_SIZE = 1000
+    DEVICES_BATCH_MAX_SIZE = 50
+    EVENTS_BATCH_MAX_SIZE = 10000
+    PUSH_NOTIFICATIONS_CHUNK_SIZE = 500  # pn_tokens per push provider request
+    PUSH_NOTIFICATIONS_BATCHES_PER_TASK = 4  # provider requests sent concurrently by a push task
+    EVENT_DESCRIPTOR_CACHE_TTL_SECONDS = 60
+    EVENT_PROCESSING_BATCH_SIZE = 100  # events claimed (and locked) at once by process_pending_events
+    EVENT_PROCESSING_MAX_BATCHES = 50  # batches drained by a process_pending_events run
+    EVENT_RETENTION_DAYS = None  # opt-in, events partitions older than this are removed whatever their expiration_date
+    EVENT_PARTITIONS_PREMAKE_MONTHS = 3  # monthly events partitions created ahead of time
+    EVENT_PARTITIONS_DETACH_ONLY = False  # detach expired partitions (e.g. to archive them) instead of dropping them
+    EVENT_PURGE_CHUNK_SIZE = 1000  # expired events deleted per transaction
+    EVENT_PURGE_MAX_CHUNKS = 100  # chunks deleted by an apply_event_retention run
+    CELERYBEAT_SCHEDULE = {
+        'process-pending-events': {
+            'task': 'project.tasks.push_notification_tasks.process_pending_events',
+            'schedule': 10.0
+        },
+        'apply-event-retention': {
+            'task': 'project.tasks.event_tasks.apply_event_retention',
+            'schedule': 3600.0
+        }
+    }
     TEMPLATES_AUTO_RELOAD = True
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
+    GOOGLE_OAUTH2_CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+    GOOGLE_CERTS_TIMEOUT_SECONDS = 5
+    FACEBOOK_GRAPH_URL = 'https://graph.facebook.com'
+    FACEBOOK_GRAPH_TIMEOUT_SECONDS = 5
+    FACEBOOK_GRAPH_POOL_SIZE = 10
+    FACEBOOK_PROFILE_CACHE_TTL_SECONDS = 60
 
 class DevelopmentConfig(BaseConfig):
     """Development configuration"""
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL')
+    PRINCIPAL_CACHE_REDIS_URL = os.environ.get('REDIS_URL')
     BCRYPT_LOG_ROUNDS = 4
+    HASHING_POOL_SIZE = 0
 
 class TestingConfig(BaseConfig):
     """Testing configuration"""
@@ -49,10 +92,13 @@ class TestingConfig(BaseConfig):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_TEST_URL')
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_TEST_URL')
+    PRINCIPAL_CACHE_REDIS_URL = os.environ.get('REDIS_TEST_URL')
     CELERY_TASK_ALWAYS_EAGER = True
     BCRYPT_LOG_ROUNDS = 4
+    HASHING_POOL_SIZE = 0
     TOKEN_EXPIRATION_DAYS = 0
     TOKEN_EXPIRATION_SECONDS = 3
+    ACCESS_TOKEN_EXPIRATION_SECONDS = 3
     TOKEN_PASSWORD_EXPIRATION_DAYS = 0
     TOKEN_PASSWORD_EXPIRATION_SECONDS = 2
     TOKEN_EMAIL_EXPIRATION_DAYS = 1
@@ -64,5 +110,6 @@ class ProductionConfig(BaseConfig):
     """Production configuration"""
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL')
+    PRINCIPAL_CACHE_REDIS_URL = os.environ.get('REDIS_URL')
     SENTRY_DSN = 'Sentry_DNS'
     TEMPLATES_AUTO_RELOAD = None
\ No newline at end of file
@@ -2,8 +2,22 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 from flask_mail import Mail
+from project.api.common.utils.token_cache import VerifiedTokenCache
+from project.api.common.utils.principal_cache import PrincipalCache
+from project.api.common.utils.hashing import PasswordHasher
+from project.api.common.utils.google_auth import GoogleTokenVerifier
+from project.api.common.utils.facebook import FacebookGraphClient
+from project.api.common.utils.push_sender import AsyncPushSender
+from project.api.common.utils.event_descriptor_catalog import EventDescriptorCatalog
 
 db = SQLAlchemy()
 migrate = Migrate()
 bcrypt = Bcrypt()
-mail = Mail()
\ No newline at end of file
+mail = Mail()
+token_cache = VerifiedTokenCache()
+principal_cache = PrincipalCache()
+password_hasher = PasswordHasher()
+google_token_verifier = GoogleTokenVerifier()
+facebook_graph_client = FacebookGraphClient()
+push_sender = AsyncPushSender()
+event_descriptor_catalog = EventDescriptorCatalog()
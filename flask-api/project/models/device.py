@@ -1,10 +1,16 @@
 # project/models/device.py
 
+import logging
 from datetime import datetime
+from sqlalchemy import case, exists, false, func, null, or_, true, tuple_
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import insert
 from project.extensions import db
 from project.models.user import User
-from project.models.group import Group
-from typing import List
+from project.models.user_group_association import UserGroupAssociation
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
 
 class Device(db.Model):
     __tablename__ = "devices"
@@ -14,7 +20,7 @@ class Device(db.Model):
     active = db.Column(db.Boolean, default=True, nullable=False)
     pn_token = db.Column(db.String(256), unique=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
-    user = db.relationship('User', backref=db.backref('devices', lazy='joined'))
+    user = db.relationship('User', backref=db.backref('devices', lazy='select'))
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -34,26 +40,98 @@ class Device(db.Model):
 
     # noinspection PyPep8
     @staticmethod
-    def query_active_devices_for_group(group: Group, discard_user_ids:List[int]=None):
-        discard_user_ids = discard_user_ids or []
-        user_ids = [user.user_id for user in group.associated_users if user.user_id not in discard_user_ids]
-        return Device.query.filter(Device.user_id.in_(tuple(user_ids)), Device.active == True,
-                                   Device.pn_token.isnot(None))
+    def query_active_devices_for_group(group_id: int, discard_user_ids:List[int]=None):
+        """Active devices of the group members, resolved by the db joining user_group_associations"""
+        query = Device.query.join(UserGroupAssociation, UserGroupAssociation.user_id == Device.user_id)\
+            .filter(UserGroupAssociation.group_id == group_id, Device.active == True, Device.pn_token.isnot(None))
+        # NOT IN with a NULL in the list matches no row, an event without creator must still reach the whole group
+        discard_user_ids = [user_id for user_id in discard_user_ids or [] if user_id is not None]
+        if discard_user_ids:
+            query = query.filter(Device.user_id.notin_(discard_user_ids))
+        return query
 
     @staticmethod
-    def create_or_update(device_id, device_type: str, user:User=None, active: bool = True, pn_token: str=None):
-        device = Device.first_by(device_id=device_id)
-        if not device:
-            device = Device(device_id=device_id, device_type=device_type, user=user, active=active, pn_token=pn_token)
-            db.session.add(device)
+    def iter_pn_tokens(query, chunk_size: int) -> Iterator[List[str]]:
+        """Streams the pn_tokens of the devices query in lists of up to chunk_size tokens through a server side cursor"""
+        statement = query.with_entities(Device.pn_token).statement.execution_options(yield_per=chunk_size)
+        result = db.session.execute(statement)
+        try:
+            for rows in result.partitions():
+                yield [pn_token for pn_token, in rows]
+        finally:
+            result.close()
+
+    @staticmethod
+    def apply_pn_token_results(dead_pn_tokens: List[str], canonical_pn_tokens: Dict[str, str]) -> int:
+        """Deactivates the devices of dead pn_tokens and replaces the pn_tokens FCM answered a canonical token for,
+        in a single UPDATE. A device whose canonical token is already owned by another device is a stale duplicate
+        and is deactivated as well. Returns the number of updated devices.
+        """
+        if not dead_pn_tokens and not canonical_pn_tokens:
+            return 0
+        if canonical_pn_tokens:
+            new_pn_token = case(canonical_pn_tokens, value=Device.pn_token)
+            other = aliased(Device)
+            stale = or_(Device.pn_token.in_(dead_pn_tokens), exists().where(other.pn_token == new_pn_token))
         else:
-            device.device_type = device_type
-            device.active = active
-            if user:
-                device.user = user
-            if pn_token:
-                device.pn_token = pn_token
-        return device
+            new_pn_token = null()
+            stale = true()
+        return Device.query.filter(Device.pn_token.in_([*dead_pn_tokens, *canonical_pn_tokens])).update({
+            Device.pn_token: case((stale, null()), else_=new_pn_token),
+            Device.active: case((stale, false()), else_=Device.active),
+            Device.updated_at: datetime.utcnow()
+        }, synchronize_session=False)
+
+    @staticmethod
+    def create_or_update(device_id, device_type: str, user:User=None, active: bool = True, pn_token: str=None):
+        """Inserts the device or updates the existing one with the same device_id in a single statement.
+
+        An INSERT ... ON CONFLICT (device_id) DO UPDATE ... RETURNING upsert, so concurrent requests
+        for the same device can not race into a unique violation. user and pn_token are only
+        replaced when given.
+        """
+        return Device.bulk_create_or_update([dict(device_id=device_id, device_type=device_type, pn_token=pn_token)],
+                                            user=user, active=active)[device_id]
+
+    @staticmethod
+    def bulk_create_or_update(devices: List[dict], user:User=None, active: bool = True) -> Dict[str, 'Device']:
+        """create_or_update for several devices ({device_id, device_type, pn_token} dicts with distinct device_ids
+        and pn_tokens) as one multi row upsert statement, returns the devices by device_id.
+
+        A pn_token belongs to a single app install, so the latest registration of a pn_token wins: any other device
+        still holding it (the same install registered again under a new device_id, possibly by another user) has its
+        pn_token cleared by a preceding UPDATE and stops receiving pushes. Only batches with pn_tokens pay for that
+        statement, a tokenless registration is a single upsert. Released tokens are logged, not reported back.
+        """
+        now = datetime.utcnow()
+        user_id = user.id if user else None
+        claimed_pn_tokens = [(device['device_id'], device['pn_token']) for device in devices if device.get('pn_token')]
+        if claimed_pn_tokens:
+            # postgres checks the unique pn_token against the rows as they were when the upsert started,
+            # so the tokens can not be released by the upsert itself
+            released = Device.query.filter(Device.pn_token.in_([pn_token for _, pn_token in claimed_pn_tokens]),
+                                           tuple_(Device.device_id, Device.pn_token).notin_(claimed_pn_tokens)) \
+                .update({Device.pn_token: None, Device.updated_at: now}, synchronize_session=False)
+            if released:
+                logger.info(f'{released} devices released their pn_token to a newly registered device')
+        statement = insert(Device).values([
+            dict(device_id=device['device_id'], device_type=device['device_type'], pn_token=device.get('pn_token'),
+                 active=active, user_id=user_id, created_at=now, updated_at=now)
+            for device in devices
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=[Device.device_id],
+            set_={
+                'device_type': statement.excluded.device_type,
+                'active': statement.excluded.active,
+                'user_id': func.coalesce(statement.excluded.user_id, Device.user_id),
+                'pn_token': func.coalesce(statement.excluded.pn_token, Device.pn_token),
+                'updated_at': now
+            }
+        ).returning(Device)
+        # RETURNING order is not guaranteed to follow the VALUES one
+        devices = db.session.scalars(statement, execution_options={'populate_existing': True}).all()
+        return {device.device_id: device for device in devices}
 
     @staticmethod
     def first_by(**kwargs):
@@ -65,3 +143,8 @@ class Device(db.Model):
         """Get first db entity that match to criterium"""
         return Device.query.filter(*criterion)
 
+
+# serves the push fan-out lookups (query_active_devices_for_user/group), pn_token is included so
+# selecting only the tokens is an index only scan (see migration 0003)
+db.Index('ix_devices_push_user_id', Device.user_id,
+         postgresql_where=db.text('active AND pn_token IS NOT NULL'), postgresql_include=['pn_token'])
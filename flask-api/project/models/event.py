@@ -2,15 +2,29 @@
 
 
 from datetime import datetime
-from project.extensions import db
+from typing import List
+from flask import current_app
+from sqlalchemy import event, insert, tuple_
+from project.extensions import db, event_descriptor_catalog
+from project.api.common.utils.event_descriptor_catalog import MessageTemplate
+from project.api.common.utils.event_partitions import create_event_partitions
 from project.models.device import Device
 
+# columns a bulk created event can set
+BULK_CREATE_FIELDS = ('event_descriptor_id', 'group_id', 'expiration_date',
+                      'entity_type', 'entity_id', 'entity_description',
+                      'entity_2_type', 'entity_2_id', 'entity_2_description',
+                      'entity_3_type', 'entity_3_id', 'entity_3_description')
+
+
 class Event(db.Model):
     __tablename__ = "events"
+    # monthly created_at range partitions (see migration 0005 and event_partitions), expired ones are dropped whole
+    __table_args__ = {'postgresql_partition_by': 'RANGE (created_at)'}
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
 
     event_descriptor_id = db.Column(db.Integer, db.ForeignKey('event_descriptors.id'), nullable=False)
-    event_descriptor = db.relationship('EventDescriptor', backref=db.backref('events', lazy='joined'))
+    event_descriptor = db.relationship('EventDescriptor', backref=db.backref('events', lazy='select'))
 
     entity_type = db.Column(db.String(128))
     entity_id = db.Column(db.Integer)
@@ -23,25 +37,81 @@ class Event(db.Model):
     entity_3_description = db.Column(db.String(128))
     expiration_date = db.Column(db.DateTime)
     group_id = db.Column(db.Integer, db.ForeignKey('groups.id'))
-    group = db.relationship('Group', backref=db.backref('events', lazy='joined'))
+    group = db.relationship('Group', backref=db.backref('events', lazy='select'))
     is_processed = db.Column(db.Boolean, default=False, nullable=False)
     creator_id = db.Column(db.Integer, db.ForeignKey('users.id'))
-    creator = db.relationship('User', backref=db.backref('events', lazy='joined'))
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    creator = db.relationship('User', backref=db.backref('events', lazy='select'))
+    # the partition key has to be part of the table primary key, events are still identified by id alone
+    created_at = db.Column(db.DateTime, primary_key=True, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __mapper_args__ = {'primary_key': [id]}
+
     def __init__(self, event_descriptor_id: int):
         self.event_descriptor_id = event_descriptor_id
 
-    def push_notification_data(self):
-        event_descriptor = self.event_descriptor
-        message_template = event_descriptor.description
-        if self.entity_description:
-            message_template = message_template.replace("{1}", self.entity_description)
-        if self.entity_2_description:
-            message_template = message_template.replace("{2}", self.entity_2_description)
-        if self.entity_3_description:
-            message_template = message_template.replace("{3}", self.entity_3_description)
-        devices = Device.query_active_devices_for_group(group=self.group, discard_user_ids=[self.creator_id]).all()
-        pn_tokens = [device.pn_token for device in devices]
-        return "Hi", message_template, pn_tokens
\ No newline at end of file
+    @staticmethod
+    def bulk_create(events: List[dict], creator_id: int = None) -> int:
+        """Inserts events (dicts of validated column values) with one multi row INSERT, without loading them
+        into the session; returns the inserted rows count"""
+        now = datetime.utcnow()
+        rows = [dict({field: None for field in BULK_CREATE_FIELDS}, **event,
+                     creator_id=creator_id, is_processed=False, created_at=now, updated_at=now)
+                for event in events]
+        if not rows:
+            return 0
+        # a Core insert keeps the None values (the ORM bulk insert groups the rows by their non null keys), so all the
+        # rows share the same parameters and are sent as batched multi row VALUES instead of one by one
+        db.session.execute(insert(Event.__table__), rows)
+        return len(rows)
+
+    @staticmethod
+    def claim_unprocessed(batch_size: int) -> List['Event']:
+        """Locks up to batch_size unprocessed events (oldest first) skipping the ones other workers already claimed"""
+        return Event.query.filter(~Event.is_processed).order_by(Event.id).limit(batch_size) \
+            .with_for_update(skip_locked=True).all()
+
+    @staticmethod
+    def mark_processed(event_ids: List[int]) -> int:
+        """Flags the given events as processed with a single UPDATE, returns the updated rows count"""
+        if not event_ids:
+            return 0
+        return Event.query.filter(Event.id.in_(event_ids)) \
+            .update({Event.is_processed: True, Event.updated_at: datetime.utcnow()}, synchronize_session=False)
+
+    @staticmethod
+    def delete_expired(chunk_size: int, now: datetime = None) -> int:
+        """Deletes up to chunk_size events past their expiration_date, skipping the rows locked by other
+        transactions, returns the deleted rows count"""
+        expired = Event.query.with_entities(Event.id, Event.created_at) \
+            .filter(Event.expiration_date < (now or datetime.utcnow())) \
+            .limit(chunk_size).with_for_update(skip_locked=True)
+        return Event.query.filter(tuple_(Event.id, Event.created_at).in_(expired)) \
+            .delete(synchronize_session=False)
+
+    def push_notification_data(self, chunk_size: int = 500):
+        """Returns the notification title, body and an iterator of pn_token lists (up to chunk_size tokens each)"""
+        message_body = self.render_message()
+        devices = Device.query_active_devices_for_group(group_id=self.group_id, discard_user_ids=[self.creator_id])
+        return "Hi", message_body, Device.iter_pn_tokens(devices, chunk_size=chunk_size)
+
+    def render_message(self) -> str:
+        """Event descriptor description with its {1}, {2} and {3} placeholders replaced by the entities descriptions"""
+        descriptor = event_descriptor_catalog.get(self.event_descriptor_id)
+        template = descriptor.template if descriptor else MessageTemplate(self.event_descriptor.description)
+        return template.render(self.entity_description, self.entity_2_description, self.entity_3_description)
+
+
+# keeps the claim query of the event processor (claim_unprocessed) cheap however many processed events
+# accumulate, it only holds the pending ones (see migration 0004)
+db.Index('ix_events_unprocessed_id', Event.id, postgresql_where=db.text('NOT is_processed'))
+# serves the expired events purge (delete_expired, see migration 0005)
+db.Index('ix_events_expiration_date', Event.expiration_date, postgresql_where=db.text('expiration_date IS NOT NULL'))
+
+
+@event.listens_for(Event.__table__, 'after_create')
+def create_partitions(target, connection, **kw):
+    """Gives a freshly created (create_all) events table a default partition and the upcoming monthly ones"""
+    if connection.dialect.name == 'postgresql':
+        connection.execute(db.text('CREATE TABLE events_default PARTITION OF events DEFAULT'))
+        create_event_partitions(connection, months_ahead=current_app.config['EVENT_PARTITIONS_PREMAKE_MONTHS'])
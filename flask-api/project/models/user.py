@@ -5,7 +5,7 @@ from enum import IntFlag
 from datetime import datetime, timedelta
 from flask import current_app
 from sqlalchemy.orm.query import Query
-from project.extensions import db, bcrypt
+from project.extensions import db, password_hasher
 from sqlalchemy.ext.associationproxy import association_proxy
 from flask_sqlalchemy import BaseQuery
 from random import randint
@@ -19,6 +19,9 @@ class UserRole(IntFlag):
 
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),  # keyset pagination of GET /users
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     given_name = db.Column(db.String(128))
     family_name = db.Column(db.String(128))
@@ -41,6 +44,7 @@ class User(db.Model):
     cellphone_validation_date = db.Column(db.DateTime, nullable=True)
     
     refer_to_friend_link = db.Column(db.String)
+    token_version = db.Column(db.Integer, default=0, nullable=False)  # bumped to revoke issued refresh tokens
 
     associated_groups = db.relationship("UserGroupAssociation", back_populates="user")
     groups = association_proxy('associated_groups', 'group')
@@ -55,8 +59,7 @@ class User(db.Model):
         self.given_name = given_name
         self.family_name = family_name
         if password:
-            self.password = bcrypt.generate_password_hash(password,
-                                                          current_app.config.get('BCRYPT_LOG_ROUNDS')).decode()
+            self.password = password_hasher.generate_password_hash(password)
         self.created_at = created_at
         self.updated_at = created_at
         self.cellphone_number = cellphone_number
@@ -88,9 +91,21 @@ class User(db.Model):
         """Get db entity that match the id"""
         return User.query.get(id)
 
+    @staticmethod
+    def query_fields(*fields: str) -> Query:
+        """Read only query selecting just the given columns, rows are plain named tuples kept out of the identity map"""
+        return db.session.query(*(getattr(User, field) for field in fields))
+
+    @staticmethod
+    def get_fields(id: int, *fields: str):
+        """Get the given columns of the user that match the id, None if it does not exist"""
+        return User.query_fields(*fields).filter(User.id == id).first()
+
 
     def encode_auth_token(self) -> str:
         """Generates the auth token"""
+        if current_app.config.get('STATELESS_AUTH'):
+            return self.encode_access_token()
         payload = {
             'exp': datetime.utcnow() + timedelta(
                 days=current_app.config['TOKEN_EXPIRATION_DAYS'],
@@ -105,16 +120,73 @@ class User(db.Model):
         )
 
 
+    def encode_access_token(self) -> str:
+        """Generates a short lived auth token carrying the user authorization claims"""
+        payload = {
+            'exp': datetime.utcnow() + timedelta(seconds=current_app.config['ACCESS_TOKEN_EXPIRATION_SECONDS']),
+            'iat': datetime.utcnow(),
+            'sub': self.id,
+            'roles': self.roles,
+            'active': self.active,
+            'ver': self.token_version or 0
+        }
+        return jwt.encode(
+            payload,
+            current_app.config.get('SECRET_KEY'),
+            algorithm='HS256'
+        )
+
+    def encode_refresh_token(self) -> str:
+        """Generates the refresh token used to get new access tokens"""
+        payload = {
+            'exp': datetime.utcnow() + timedelta(
+                days=current_app.config['TOKEN_EXPIRATION_DAYS'],
+                seconds=current_app.config['TOKEN_EXPIRATION_SECONDS']),
+            'iat': datetime.utcnow(),
+            'sub': self.id,
+            'ver': self.token_version or 0,
+            'type': 'refresh'
+        }
+        return jwt.encode(
+            payload,
+            current_app.config.get('SECRET_KEY'),
+            algorithm='HS256'
+        )
+
+    @staticmethod
+    def decode_refresh_token(refresh_token: str) -> dict:
+        """Decodes the refresh token - :param refresh_token: - :return: token payload"""
+        try:
+            payload = jwt.decode(refresh_token, current_app.config.get('SECRET_KEY'), algorithms=["HS256"])
+        except jwt.ExpiredSignatureError:
+            raise UnauthorizedException(message='Signature expired. Please log in again.')
+        except jwt.InvalidTokenError:
+            raise UnauthorizedException(message='Invalid token. Please log in again.')
+        if payload.get('type') != 'refresh':
+            raise UnauthorizedException(message='Invalid token. Please log in again.')
+        return payload
+
+    def revoke_tokens(self):
+        """Invalidates every refresh token issued so far"""
+        self.token_version = (self.token_version or 0) + 1
+
     @staticmethod
     def decode_auth_token(auth_token: str) -> int:
         """Decodes the auth token - :param auth_token: - :return: integer|string"""
+        return User.decode_auth_token_payload(auth_token)['sub']
+
+    @staticmethod
+    def decode_auth_token_payload(auth_token: str) -> dict:
+        """Decodes and verifies the auth token returning its whole payload"""
         try:
             payload = jwt.decode(auth_token, current_app.config.get('SECRET_KEY'), algorithms=["HS256"])
-            return payload['sub']
         except jwt.ExpiredSignatureError:
             raise UnauthorizedException(message='Signature expired. Please log in again.')
         except jwt.InvalidTokenError:
             raise UnauthorizedException(message='Invalid token. Please log in again.')
+        if payload.get('type') == 'refresh':
+            raise UnauthorizedException(message='Invalid token. Please log in again.')
+        return payload
 
     def encode_password_token(self) -> str:
         """Generates the auth token"""
@@ -0,0 +1,35 @@
+# project/tasks/event_tasks.py
+
+from flask import current_app
+from project import celery
+from project.extensions import db
+from project.api.common.utils.event_partitions import create_event_partitions, remove_expired_event_partitions
+from project.models.event import Event
+
+
+@celery.task
+def apply_event_retention():
+    """Keeps the events table bounded, every step is idempotent so runs can be repeated or skipped.
+
+    Creates the upcoming monthly partitions, removes the past ones whose events are all expired (and, when the
+    `EVENT_RETENTION_DAYS` window is set, the ones older than it) and deletes the remaining events past their
+    expiration_date in chunks of `EVENT_PURGE_CHUNK_SIZE`, each one committed on its own to keep locks and vacuum
+    work small.
+    """
+    config = current_app.config
+    connection = db.session.connection()
+    created = create_event_partitions(connection, months_ahead=config['EVENT_PARTITIONS_PREMAKE_MONTHS'])
+    removed = remove_expired_event_partitions(connection, retention_days=config['EVENT_RETENTION_DAYS'],
+                                              detach_only=config['EVENT_PARTITIONS_DETACH_ONLY'])
+    db.session.commit()
+    chunk_size = config['EVENT_PURGE_CHUNK_SIZE']
+    deleted = 0
+    for _ in range(config['EVENT_PURGE_MAX_CHUNKS']):
+        count = Event.delete_expired(chunk_size)
+        db.session.commit()
+        deleted += count
+        if count < chunk_size:
+            break
+    result = {'created_partitions': created, 'removed_partitions': removed, 'deleted_events': deleted}
+    current_app.logger.info(f'event retention applied: {result}')
+    return result
@@ -1,8 +1,99 @@
 # project/api/tasks/push_notification_tasks.py
 
-from project import celery, push_service
+from typing import Dict, List, Tuple
+
+from flask import current_app
+from project import celery
+from project.extensions import db, push_sender
+from project.models.device import Device
+from project.models.event import Event
+
+
+# FCM errors meaning the token will never be valid again
+DEAD_PN_TOKEN_ERRORS = ('NotRegistered', 'InvalidRegistration')
+
+
+def parse_push_results(pn_tokens: List[str], results: List[dict]) -> Tuple[List[str], Dict[str, str]]:
+    """Splits FCM per token results (same order as pn_tokens) into dead tokens and {token: canonical token} replacements"""
+    dead_pn_tokens, canonical_pn_tokens = [], {}
+    for pn_token, result in zip(pn_tokens, results):
+        if result.get('error') in DEAD_PN_TOKEN_ERRORS:
+            dead_pn_tokens.append(pn_token)
+        elif result.get('registration_id'):
+            if result['registration_id'] in canonical_pn_tokens.values():
+                # several stale tokens of the same app install, keep a single device
+                dead_pn_tokens.append(pn_token)
+            else:
+                canonical_pn_tokens[pn_token] = result['registration_id']
+    return dead_pn_tokens, canonical_pn_tokens
 
 
 @celery.task
 def send_async_push_notifications(message_title, message_body, pn_tokens):
-    _ = push_service.notify_multiple_devices(registration_ids=pn_tokens, message_title=message_title, message_body=message_body)
+    """Pushes to pn_tokens in provider sized batches sent concurrently, then prunes dead and replaced tokens"""
+    batch_size = current_app.config['PUSH_NOTIFICATIONS_CHUNK_SIZE']
+    batches = [pn_tokens[i:i + batch_size] for i in range(0, len(pn_tokens), batch_size)]
+    responses = push_sender.send_multicast(batches, message_title=message_title, message_body=message_body)
+    counts = {'success': 0, 'failure': 0, 'dead': 0, 'canonical': 0, 'updated_devices': 0, 'failed_batches': 0}
+    for batch, response in zip(batches, responses):
+        if response is None:
+            counts['failed_batches'] += 1
+            counts['failure'] += len(batch)
+            continue
+        dead_pn_tokens, canonical_pn_tokens = parse_push_results(batch, response.get('results', []))
+        counts['success'] += response.get('success', 0)
+        counts['failure'] += response.get('failure', 0)
+        counts['dead'] += len(dead_pn_tokens)
+        counts['canonical'] += len(canonical_pn_tokens)
+        counts['updated_devices'] += Device.apply_pn_token_results(dead_pn_tokens, canonical_pn_tokens)
+    db.session.commit()
+    current_app.logger.info(f'push notifications sent: {counts}')
+    return counts
+
+
+def dispatch_event_push_notifications(event: Event):
+    """Resolves the event audience page by page and queues one send_async_push_notifications task per page"""
+    page_size = current_app.config['PUSH_NOTIFICATIONS_CHUNK_SIZE'] * current_app.config['PUSH_NOTIFICATIONS_BATCHES_PER_TASK']
+    message_title, message_body, pn_token_chunks = event.push_notification_data(chunk_size=page_size)
+    for pn_tokens in pn_token_chunks:
+        send_async_push_notifications.delay(message_title=message_title, message_body=message_body, pn_tokens=pn_tokens)
+
+
+@celery.task
+def send_event_push_notifications(event_id):
+    """Dispatches the push notifications of a single event, unless it is processed or claimed by another worker"""
+    event = Event.query.filter(Event.id == event_id, ~Event.is_processed).with_for_update(skip_locked=True).first()
+    if not event:
+        return
+    dispatch_event_push_notifications(event)
+    event.is_processed = True
+    db.session.commit()
+
+
+@celery.task
+def process_pending_events():
+    """Drains unprocessed events in batches of `EVENT_PROCESSING_BATCH_SIZE`, returns the processed events count.
+
+    Each batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers split the backlog
+    between them instead of waiting for (or sending twice) the same events. The row locks are held until
+    the batch is flagged as processed, a single UPDATE committed right after its fan-out is queued.
+    A run stops after `EVENT_PROCESSING_MAX_BATCHES` batches so a large backlog does not pin a worker, and
+    queues a follow up run when its last batch was full, the backlog is drained without waiting for beat.
+    """
+    batch_size = current_app.config['EVENT_PROCESSING_BATCH_SIZE']
+    processed = 0
+    for _ in range(current_app.config['EVENT_PROCESSING_MAX_BATCHES']):
+        events = Event.claim_unprocessed(batch_size)
+        if not events:
+            break
+        for event in events:
+            dispatch_event_push_notifications(event)
+        processed += Event.mark_processed([event.id for event in events])
+        db.session.commit()
+        if len(events) < batch_size:
+            break
+    else:
+        process_pending_events.delay()
+    if processed:
+        current_app.logger.info(f'events processed: {processed}')
+    return processed
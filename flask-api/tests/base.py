@@ -4,7 +4,7 @@ import os
 os.environ["APP_SETTINGS"] = "project.config.TestingConfig"
 from flask_testing import TestCase
 from project import app
-from project.extensions import db
+from project.extensions import db, principal_cache, event_descriptor_catalog
 
 class BaseTestCase(TestCase):
     def create_app(self):
@@ -14,6 +14,8 @@ class BaseTestCase(TestCase):
     def setUp(self):
         db.create_all()
         db.session.commit()
+        principal_cache.clear()
+        event_descriptor_catalog.clear()
 
     def tearDown(self):
         db.session.remove()
@@ -0,0 +1,47 @@
+# project/tests/fcm_stub.py
+
+import argparse
+import asyncio
+import random
+from itertools import count
+
+import orjson
+from aiohttp import web
+
+_message_ids = count(1)
+
+
+def fcm_response(payload: dict, dead_ratio: float = 0.0) -> dict:
+    """Legacy FCM multicast response for payload, answering NotRegistered for a dead_ratio share of the tokens"""
+    results = []
+    for _ in payload.get('registration_ids', []):
+        if dead_ratio and random.random() < dead_ratio:
+            results.append({'error': 'NotRegistered'})
+        else:
+            results.append({'message_id': f'0:{next(_message_ids)}'})
+    failure = sum(1 for result in results if 'error' in result)
+    return {'multicast_id': next(_message_ids), 'success': len(results) - failure, 'failure': failure,
+            'canonical_ids': 0, 'results': results}
+
+
+def create_fcm_stub(latency_ms: int = 0, dead_ratio: float = 0.0) -> web.Application:
+    """Local stand-in for the FCM send endpoint (POST /fcm/send), used to test and benchmark push delivery"""
+    async def send(request: web.Request) -> web.Response:
+        payload = orjson.loads(await request.read())
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        return web.Response(body=orjson.dumps(fcm_response(payload, dead_ratio)), content_type='application/json')
+
+    app = web.Application()
+    app.router.add_post('/fcm/send', send)
+    return app
+
+
+if __name__ == '__main__':
+    # python -m tests.fcm_stub --port 8090 --latency-ms 50, then point FCM_ENDPOINT (or benchmark_push) to it
+    parser = argparse.ArgumentParser(description='Runs a local FCM stand-in server answering POST /fcm/send.')
+    parser.add_argument('--port', type=int, default=8090, help='Port to listen on.')
+    parser.add_argument('--latency-ms', type=int, default=50, help='Simulated provider latency per request.')
+    parser.add_argument('--dead-ratio', type=float, default=0.0, help='Share of tokens answered as NotRegistered.')
+    args = parser.parse_args()
+    web.run_app(create_fcm_stub(latency_ms=args.latency_ms, dead_ratio=args.dead_ratio), port=args.port)
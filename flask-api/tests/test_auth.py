@@ -1,12 +1,16 @@
 import json
 import time
 import unittest
+import uuid
+from unittest import mock
 
-from project.extensions import db
+from project import app
+from project.extensions import db, bcrypt, password_hasher
 from project.models.user import User
+from project.models.device import Device
 from project.api.common.utils.constants import Constants
 from tests.base import BaseTestCase
-from tests.utils import add_user, set_user_token_hash, set_user_email_token_hash
+from tests.utils import add_user, add_device, set_user_token_hash, set_user_email_token_hash, capture_queries
 
 class TestAuthBlueprint(BaseTestCase):
 
@@ -28,6 +32,28 @@ class TestAuthBlueprint(BaseTestCase):
             self.assertEqual(response.content_type, 'application/json')
             self.assertEqual(response.status_code, 201)
 
+    def test_user_registration_single_transaction(self):
+        device_id = uuid.uuid4().hex
+        with self.client:
+            with capture_queries() as statements:
+                response = self.client.post(
+                    '/v1/auth/register',
+                    data=json.dumps(dict(
+                        email='test@test.com',
+                        password='123456'
+                    )),
+                    content_type='application/json',
+                    headers=[('Accept', 'application/json'), (Constants.HttpHeaders.DEVICE_ID, device_id), (Constants.HttpHeaders.DEVICE_TYPE, 'apple')]
+                )
+            self.assertEqual(response.status_code, 201)
+        # the new user is not reloaded after commit
+        insert_index = next(i for i, s in enumerate(statements) if s.lstrip().upper().startswith('INSERT INTO USERS'))
+        self.assertFalse([s for s in statements[insert_index:] if s.lstrip().upper().startswith('SELECT') and 'FROM users' in s])
+        user = User.first_by(email='test@test.com')
+        self.assertTrue(user.email_token_hash)
+        device = Device.first_by(device_id=device_id)
+        self.assertEqual(device.user_id, user.id)
+
     def test_user_registration_duplicate_email(self):
         add_user(email='test@test.com', password='test')
         with self.client:
@@ -107,6 +133,25 @@ class TestAuthBlueprint(BaseTestCase):
             self.assertEqual(response.content_type, 'application/json')
             self.assertEqual(response.status_code, 200)
 
+    def test_login_rehashes_password_with_configured_rounds(self):
+        user = add_user(email='test@test.com', password='test')
+        self.assertEqual(password_hasher.hash_rounds(user.password), 4)
+        with self.client, mock.patch.dict(app.config, {'BCRYPT_LOG_ROUNDS': 5}):
+            response = self.client.post(
+                '/v1/auth/login',
+                data=json.dumps(dict(
+                    email='test@test.com',
+                    password='test'
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            self.assertEqual(response.status_code, 200)
+            user = User.get(user.id)
+            self.assertEqual(password_hasher.hash_rounds(user.password), 5)
+            self.assertTrue(password_hasher.check_password_hash(user.password, 'test'))
+        self.assertEqual(app.config['BCRYPT_LOG_ROUNDS'], 4)
+
     def test_not_registered_user_login(self):
         with self.client:
             response = self.client.post(
@@ -208,6 +253,41 @@ class TestAuthBlueprint(BaseTestCase):
             self.assertEqual(response.status_code, 200)
 
 
+    def test_logged_user_loaded_once_per_request(self):
+        user = add_user(email='test@test.com', password='test')
+        auth_token = user.encode_auth_token()
+        db.session.expunge_all()
+        with self.client:
+            with capture_queries() as statements:
+                response = self.client.get(
+                    '/v1/auth/logout',
+                    headers=[('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+                )
+            self.assertEqual(response.status_code, 200)
+            user_selects = [s for s in statements if s.lstrip().upper().startswith('SELECT') and 'FROM users' in s]
+            self.assertEqual(len(user_selects), 1)
+
+
+    def test_auth_path_does_not_load_collections(self):
+        user = add_user(email='test@test.com', password='test')
+        for i in range(3):
+            add_device(device_id=f'device_{i}', device_type='apple', user=user)
+        auth_token = user.encode_auth_token()
+        db.session.expunge_all()
+        with self.client:
+            with capture_queries() as statements:
+                response = self.client.get(
+                    '/v1/auth/status',
+                    headers=[('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(statements), 1)
+            self.assertIn('FROM users', statements[0])
+            self.assertNotIn('JOIN', statements[0].upper())
+            self.assertNotIn('devices', statements[0])
+            self.assertNotIn('events', statements[0])
+
+
     def test_invalid_status(self):
         with self.client:
             response = self.client.get(
@@ -414,6 +494,27 @@ class TestAuthBlueprint(BaseTestCase):
             #  check db password have really changed
             self.assertNotEqual(user_password_before, user.password)
 
+    def test_password_reset_legacy_bcrypt_token_hash(self):
+        user = add_user(email='test@test.com', password='password')
+        token = user.encode_password_token()
+        user.token_hash = bcrypt.generate_password_hash(token[:72], app.config.get('BCRYPT_LOG_ROUNDS')).decode()
+        db.session.commit()
+
+        with self.client:
+            response = self.client.put(
+                '/v1/auth/password',
+                data=json.dumps(dict(
+                    token=token,
+                    password='password2'
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(data['status'], 'success')
+            self.assertEqual(data['message'], 'Successfully reset password.')
+            self.assertEqual(response.status_code, 200)
+
     def test_register_verify_cellphone(self):
         email = 'test@test.com'
         user = add_user(email=email, password='password')
@@ -598,6 +699,7 @@ class TestAuthBlueprint(BaseTestCase):
             self.assertEqual(data['status'], 'success')
             self.assertEqual(data['message'], 'Successful email verification.')
             self.assertIsNotNone(user.email_validation_date)
+            self.assertIsNone(user.email_token_hash)
 
     def test_password_change(self):
         email = 'test@test.com'
@@ -674,3 +776,58 @@ class TestAuthBlueprint(BaseTestCase):
             data = json.loads(response.data.decode())
             self.assertEqual(data['status'], 'error')
             self.assertEqual(data['message'], 'Invalid password. Please try again.')
+
+    @mock.patch.dict(app.config, {'STATELESS_AUTH': True})
+    def test_stateless_auth_refresh_token(self):
+        user = add_user(email='test@test.com', password='test')
+        with self.client:
+            resp_login = self.client.post(
+                '/v1/auth/login',
+                data=json.dumps(dict(
+                    email='test@test.com',
+                    password='test'
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            data = json.loads(resp_login.data.decode())
+            self.assertTrue(data['auth_token'])
+            self.assertTrue(data['refresh_token'])
+            payload = User.decode_auth_token_payload(data['auth_token'])
+            self.assertEqual(payload['roles'], user.roles)
+            self.assertTrue(payload['active'])
+
+            # refresh tokens are not accepted as auth tokens
+            response = self.client.get(
+                '/v1/auth/logout',
+                headers=[('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + data['refresh_token'])]
+            )
+            self.assertEqual(response.status_code, 401)
+
+            response = self.client.post(
+                '/v1/auth/refresh',
+                data=json.dumps(dict(refresh_token=data['refresh_token'])),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            refresh_data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(refresh_data['message'], 'Successfully refreshed token.')
+
+            response = self.client.get(
+                '/v1/auth/logout',
+                headers=[('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + refresh_data['auth_token'])]
+            )
+            self.assertEqual(response.status_code, 200)
+
+            # changing the password revokes the issued refresh tokens
+            user = User.get(user.id)
+            user.revoke_tokens()
+            db.session.commit()
+            response = self.client.post(
+                '/v1/auth/refresh',
+                data=json.dumps(dict(refresh_token=refresh_data['refresh_token'])),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            self.assertEqual(response.status_code, 401)
@@ -2,7 +2,7 @@
 
 import unittest
 import os
-from project import app
+from project import app, celery
 from flask_testing import TestCase
 
 
@@ -50,3 +50,15 @@ class TestProductionConfig(TestCase):
         self.assertEqual(app.config['TOKEN_EXPIRATION_SECONDS'], 0)
 
 
+class TestCeleryConfig(TestCase):
+    def create_app(self):
+        app.config.from_object('project.config.ProductionConfig')
+        return app
+
+    def test_beat_schedule_runs_registered_tasks(self):
+        # the worker only registers the task modules of the celery include list
+        celery.loader.import_default_modules()
+        self.assertEqual(celery.conf.beat_schedule, app.config['CELERYBEAT_SCHEDULE'])
+        self.assertEqual(celery.conf.beat_schedule['process-pending-events']['schedule'], 10.0)
+        for entry in celery.conf.beat_schedule.values():
+            self.assertIn(entry['task'], celery.tasks)
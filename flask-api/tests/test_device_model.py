@@ -1,11 +1,12 @@
 # project/tests/test_user_model.py
 
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 
 from project.extensions import db
 from project.models.device import Device
 from tests.base import BaseTestCase
-from tests.utils import add_device
+from tests.utils import add_device, add_user, add_group, add_user_group_association, capture_queries
 
 
 class TestDeviceModel(BaseTestCase):
@@ -25,3 +26,65 @@ class TestDeviceModel(BaseTestCase):
         duplicate_device = Device(device_id="device_id", device_type="android")
         db.session.add(duplicate_device)
         self.assertRaises(IntegrityError, db.session.commit)
+
+    def test_active_devices_for_group(self):
+        group = add_group(name='group')
+        other_group = add_group(name='other group')
+        creator = add_user(email='creator@test.com', password='test')
+        add_user_group_association(user=creator, group=group)
+        add_device(device_id='creator_device', device_type='apple', pn_token='creator_token', user=creator)
+        for i in range(5):
+            member = add_user(email=f'member{i}@test.com', password='test')
+            add_user_group_association(user=member, group=group)
+            add_device(device_id=f'device_{i}', device_type='apple', pn_token=f'token_{i}', user=member)
+        add_device(device_id='inactive_device', device_type='apple', active=False, pn_token='inactive_token', user=member)
+        add_device(device_id='no_token_device', device_type='apple', user=member)
+        outsider = add_user(email='outsider@test.com', password='test')
+        add_user_group_association(user=outsider, group=other_group)
+        add_device(device_id='outsider_device', device_type='apple', pn_token='outsider_token', user=outsider)
+        group_id, creator_id = group.id, creator.id
+        db.session.expunge_all()
+
+        with capture_queries() as statements:
+            query = Device.query_active_devices_for_group(group_id=group_id, discard_user_ids=[creator_id])
+            chunks = list(Device.iter_pn_tokens(query, chunk_size=2))
+        self.assertEqual(len(statements), 1)
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(sorted(token for chunk in chunks for token in chunk), [f'token_{i}' for i in range(5)])
+        tokens = [device.pn_token for device in Device.query_active_devices_for_group(group_id=group_id)]
+        self.assertEqual(len(tokens), 6)
+        self.assertIn('creator_token', tokens)
+        # an event without creator discards nobody
+        tokens = [device.pn_token for device in Device.query_active_devices_for_group(group_id=group_id, discard_user_ids=[None])]
+        self.assertEqual(len(tokens), 6)
+
+
+class TestDevicePushIndex(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        if db.engine.dialect.name != 'postgresql':
+            self.skipTest('partial index plans are postgresql specific')
+        self.user = add_user(email='test@test.com', password='test')
+        self.group = add_group(name='group')
+        add_user_group_association(user=self.user, group=self.group)
+        add_device(device_id='device', device_type='apple', pn_token='pn_token', user=self.user)
+
+    def explain(self, query) -> str:
+        statement = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+        # the test table is tiny, make the planner pick the plan it would use on a large one
+        db.session.execute(text('SET LOCAL enable_seqscan = off'))
+        db.session.execute(text('SET LOCAL enable_bitmapscan = off'))
+        plan = '\n'.join(row[0] for row in db.session.execute(text(f'EXPLAIN {statement}')))
+        db.session.rollback()
+        return plan
+
+    def test_active_devices_for_user_uses_push_index(self):
+        query = Device.query_active_devices_for_user(self.user).with_entities(Device.pn_token)
+        plan = self.explain(query)
+        self.assertIn('Index Only Scan using ix_devices_push_user_id', plan)
+
+    def test_active_devices_for_group_uses_push_index(self):
+        query = Device.query_active_devices_for_group(self.group.id).with_entities(Device.pn_token)
+        plan = self.explain(query)
+        self.assertIn('ix_devices_push_user_id', plan)
@@ -1,11 +1,12 @@
 import json
 import uuid
 
+from project.extensions import db
 from project.models.user import UserRole
 from project.models.device import Device
 from project.api.common.utils.constants import Constants
 from tests.base import BaseTestCase
-from tests.utils import add_user
+from tests.utils import add_user, capture_queries
 
 
 class TestDevicesBlueprint(BaseTestCase):
@@ -179,3 +180,102 @@ class TestDevicesBlueprint(BaseTestCase):
             self.assertFalse(user.devices[0].active)
             self.assertIsNone(user.devices[0].pn_token)
             self.assertEqual(user.devices[0].user_id, user.id)
+
+    def test_create_or_update_upserts_in_one_statement(self):
+        user = add_user(email='test@test.com', password='test')
+        user_id = user.id
+        device_id = uuid.uuid4().hex
+        with capture_queries() as statements:
+            device = Device.create_or_update(device_id=device_id, device_type='apple')
+        self.assertEqual([statement.split()[0] for statement in statements], ['INSERT'])
+        self.assertIsNone(device.user_id)
+        with capture_queries() as statements:
+            device = Device.create_or_update(device_id=device_id, device_type='apple', pn_token='token_1')
+        # a given pn_token is first released by any other device holding it
+        self.assertEqual([statement.split()[0] for statement in statements], ['UPDATE', 'INSERT'])
+        with capture_queries() as statements:
+            device = Device.create_or_update(device_id=device_id, device_type='android', user=user)
+        self.assertEqual([statement.split()[0] for statement in statements], ['INSERT'])
+        db.session.commit()
+        self.assertEqual(Device.query.filter_by(device_id=device_id).count(), 1)
+        self.assertEqual(device.device_type, 'android')
+        self.assertEqual(device.user_id, user_id)
+        # pn_token is kept when not given
+        self.assertEqual(device.pn_token, 'token_1')
+
+    def test_batch_device_registration(self):
+        Device.create_or_update(device_id='device_1', device_type='apple', pn_token='token_1')
+        db.session.commit()
+        devices = [
+            dict(device_id='device_1', device_type='android'),
+            dict(device_id='device_2', device_type='apple', pn_token='token_2'),
+            dict(device_id='device_3', device_type='apple'),
+            dict(device_id='device_3', device_type='android'),
+            dict(device_id='device_4'),
+        ]
+        with self.client:
+            with capture_queries() as statements:
+                response = self.client.post(
+                    '/v1/devices/batch',
+                    data=json.dumps(devices),
+                    content_type='application/json',
+                    headers=[('Accept', 'application/json')]
+                )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(data['status'], 'success')
+            self.assertEqual([item['status'] for item in data['data']['devices']], ['success', 'success', 'success', 'error', 'error'])
+            self.assertEqual(data['data']['devices'][3]['message'], 'Duplicated device_id.')
+            self.assertEqual(data['data']['devices'][4]['message'], 'Invalid payload.')
+            self.assertEqual(len([s for s in statements if s.lstrip().upper().startswith('INSERT')]), 1)
+            device = Device.first_by(device_id='device_1')
+            self.assertEqual(device.device_type, 'android')
+            self.assertEqual(device.pn_token, 'token_1')
+            self.assertEqual(Device.first_by(device_id='device_2').pn_token, 'token_2')
+            self.assertEqual(Device.first_by(device_id='device_3').device_type, 'apple')
+            self.assertIsNone(Device.first_by(device_id='device_4'))
+
+    def test_batch_device_registration_invalid_payload(self):
+        with self.client:
+            for payload in [[], dict(device_id='device_1', device_type='apple'), [dict(device_id='device', device_type='apple')] * 51]:
+                response = self.client.post(
+                    '/v1/devices/batch',
+                    data=json.dumps(payload),
+                    content_type='application/json',
+                    headers=[('Accept', 'application/json')]
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_batch_device_registration_pn_token_conflicts(self):
+        Device.create_or_update(device_id='old_device', device_type='apple', pn_token='token_1')
+        Device.create_or_update(device_id='device_2', device_type='apple', pn_token='token_2')
+        db.session.commit()
+        devices = [
+            dict(device_id='new_device', device_type='apple', pn_token='token_1'),
+            dict(device_id='device_2', device_type='apple', pn_token='token_3'),
+            dict(device_id='device_4', device_type='android', pn_token='token_2'),
+            dict(device_id='device_5', device_type='android', pn_token='token_3'),
+            dict(device_id='device_6', device_type=['apple']),
+            dict(device_id='device_7', device_type='apple', pn_token=7),
+            dict(device_id='x' * 129, device_type='apple'),
+        ]
+        with self.client:
+            response = self.client.post(
+                '/v1/devices/batch',
+                data=json.dumps(devices),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([item['message'] for item in data['data']['devices']], [
+                'Device successfully registered.', 'Device successfully registered.', 'Device successfully registered.',
+                'Duplicated pn_token.', 'Invalid payload.', 'Invalid payload.', 'Invalid payload.'
+            ])
+            db.session.expire_all()
+            # the pn_tokens moved to the devices that registered them last
+            self.assertIsNone(Device.first_by(device_id='old_device').pn_token)
+            self.assertEqual(Device.first_by(device_id='new_device').pn_token, 'token_1')
+            self.assertEqual(Device.first_by(device_id='device_2').pn_token, 'token_3')
+            self.assertEqual(Device.first_by(device_id='device_4').pn_token, 'token_2')
+            self.assertIsNone(Device.first_by(device_id='device_5'))
@@ -0,0 +1,86 @@
+# project/tests/test_event_descriptor_catalog.py
+
+from sqlalchemy import update
+
+from project import app
+from project.extensions import db, event_descriptor_catalog
+from project.models.event import Event
+from project.models.event_descriptor import EventDescriptor
+from project.api.common.utils.event_descriptor_catalog import MessageTemplate
+from tests.base import BaseTestCase
+from tests.utils import capture_queries
+
+
+class TestEventDescriptorCatalog(BaseTestCase):
+
+    def tearDown(self):
+        app.config.from_object('project.config.TestingConfig')
+        event_descriptor_catalog.init_app(app)
+        super().tearDown()
+
+    def add_event(self, descriptor_id: int, *entity_descriptions: str) -> Event:
+        event = Event(event_descriptor_id=descriptor_id)
+        event.entity_description, event.entity_2_description, event.entity_3_description = \
+            (list(entity_descriptions) + [None] * 3)[:3]
+        db.session.add(event)
+        db.session.commit()
+        return event
+
+    def test_message_template(self):
+        template = MessageTemplate('{1} invited {2} to {3}, {1}!')
+        self.assertEqual(template.render('Ann', 'Bob', 'the group'), 'Ann invited Bob to the group, Ann!')
+        self.assertEqual(template.render('Ann', None, None), 'Ann invited {2} to {3}, Ann!')
+        self.assertEqual(MessageTemplate('No placeholders').render('Ann'), 'No placeholders')
+        self.assertEqual(MessageTemplate('{4} {1}').render('Ann'), '{4} Ann')
+
+    def test_render_message_does_not_hit_the_db(self):
+        db.session.add(EventDescriptor(id=1, name='joined', description='{1} joined {2}'))
+        db.session.commit()
+        event = self.add_event(1, 'Ann', 'the group')
+        event_id = event.id
+        db.session.expunge_all()
+        event = db.session.get(Event, event_id)
+        load_count = event_descriptor_catalog.load_count
+        self.assertEqual(event.render_message(), 'Ann joined the group')
+        with capture_queries() as statements:
+            for _ in range(10):
+                self.assertEqual(event.render_message(), 'Ann joined the group')
+        self.assertEqual(statements, [])
+        self.assertEqual(event_descriptor_catalog.load_count, load_count + 1)
+
+    def test_descriptor_writes_invalidate_the_catalog(self):
+        descriptor = EventDescriptor(id=1, name='joined', description='{1} joined')
+        db.session.add(descriptor)
+        db.session.commit()
+        event = self.add_event(1, 'Ann')
+        self.assertEqual(event.render_message(), 'Ann joined')
+        descriptor.description = '{1} is now a member'
+        db.session.commit()
+        self.assertEqual(event.render_message(), 'Ann is now a member')
+
+    def test_version_change_is_picked_up_after_ttl(self):
+        app.config['EVENT_DESCRIPTOR_CACHE_TTL_SECONDS'] = 0
+        event_descriptor_catalog.init_app(app)
+        db.session.add(EventDescriptor(id=1, name='joined', description='{1} joined'))
+        db.session.commit()
+        event = self.add_event(1, 'Ann')
+        load_count = event_descriptor_catalog.load_count
+        self.assertEqual(event.render_message(), 'Ann joined')
+        self.assertEqual(event.render_message(), 'Ann joined')
+        self.assertEqual(event_descriptor_catalog.load_count, load_count + 1)
+        # a write the orm events do not see, like another process would do
+        db.session.execute(update(EventDescriptor).values(description='{1} left', updated_at=db.func.now()))
+        db.session.commit()
+        self.assertEqual(event.render_message(), 'Ann left')
+        self.assertEqual(event_descriptor_catalog.load_count, load_count + 2)
+
+    def test_unknown_descriptor_falls_back_to_the_db(self):
+        db.session.add(EventDescriptor(id=1, name='joined', description='{1} joined'))
+        db.session.commit()
+        event_descriptor_catalog.get(1)
+        # created behind the catalog back
+        db.session.execute(EventDescriptor.__table__.insert().values(id=2, name='left', description='{1} left',
+                                                                     created_at=db.func.now(), updated_at=db.func.now()))
+        db.session.commit()
+        event = self.add_event(2, 'Ann')
+        self.assertEqual(event.render_message(), 'Ann left')
@@ -1,5 +1,8 @@
 # project/tests/test_event_model.py
 
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
 from project.extensions import db
 from project.models.event import Event
 from project.models.event_descriptor import EventDescriptor
@@ -20,3 +23,46 @@ class TestEventModel(BaseTestCase):
         self.assertTrue(event_descriptor.id)
         self.assertTrue(event_descriptor.created_at)
         self.assertTrue(event_descriptor.updated_at)
+
+
+class TestEventClaim(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        if db.engine.dialect.name != 'postgresql':
+            self.skipTest('SKIP LOCKED and partial index plans are postgresql specific')
+        db.session.add(EventDescriptor(id=1, name='event_name', description='event_description'))
+        db.session.add_all([Event(event_descriptor_id=1) for _ in range(5)])
+        db.session.commit()
+
+    def test_concurrent_claims_do_not_overlap(self):
+        other_session = Session(bind=db.engine)
+        try:
+            claimed = [event.id for event in Event.claim_unprocessed(batch_size=3)]
+            other_claimed = [event.id for event in other_session.query(Event).filter(~Event.is_processed)
+                             .order_by(Event.id).limit(3).with_for_update(skip_locked=True)]
+            self.assertEqual(len(claimed), 3)
+            self.assertEqual(len(other_claimed), 2)
+            self.assertFalse(set(claimed) & set(other_claimed))
+            self.assertEqual(Event.mark_processed(claimed), 3)
+            db.session.commit()
+        finally:
+            other_session.rollback()
+            other_session.close()
+        self.assertEqual(len(Event.claim_unprocessed(batch_size=10)), 2)
+        db.session.rollback()
+
+    def test_claim_uses_unprocessed_index(self):
+        statement = Event.query.filter(~Event.is_processed).order_by(Event.id).limit(100).statement \
+            .compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+        # the test table is tiny, make the planner pick the plan it would use on a large one
+        db.session.execute(text('SET LOCAL enable_seqscan = off'))
+        plan = '\n'.join(row[0] for row in db.session.execute(text(f'EXPLAIN {statement}')))
+        # every partition is scanned through its own copy of the partitioned index
+        partition_indexes = [name for name, in db.session.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'ix_events_unprocessed_id'::regclass"))]
+        db.session.rollback()
+        self.assertTrue(partition_indexes)
+        for name in partition_indexes:
+            self.assertIn(f'Index Scan using {name}', plan)
@@ -0,0 +1,117 @@
+# project/tests/test_event_retention.py
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from project import app
+from project.extensions import db
+from project.models.event import Event
+from project.models.event_descriptor import EventDescriptor
+from project.api.common.utils.event_partitions import list_event_partitions, create_event_partitions, \
+    remove_expired_event_partitions, month_start
+from project.tasks.event_tasks import apply_event_retention
+from tests.base import BaseTestCase
+
+
+class TestEventRetention(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        if db.engine.dialect.name != 'postgresql':
+            self.skipTest('events partitioning is postgresql specific')
+        db.session.add(EventDescriptor(id=1, name='event_name', description='event_description'))
+        db.session.commit()
+
+    def tearDown(self):
+        app.config.from_object('project.config.TestingConfig')
+        db.session.rollback()
+        # detached partitions are not dropped along with the events table
+        for name, in db.session.execute(text("SELECT tablename FROM pg_tables WHERE tablename LIKE 'events_p%'")):
+            db.session.execute(text(f'DROP TABLE IF EXISTS {name}'))
+        db.session.commit()
+        super().tearDown()
+
+    def add_event(self, created_at: datetime, expiration_date: datetime = None) -> Event:
+        event = Event(event_descriptor_id=1)
+        event.created_at = created_at
+        event.expiration_date = expiration_date
+        db.session.add(event)
+        db.session.commit()
+        return event
+
+    def partition_names(self):
+        return [partition.name for partition in list_event_partitions(db.session.connection())]
+
+    def test_created_table_has_default_and_upcoming_partitions(self):
+        current_month = month_start(datetime.utcnow())
+        premake_months = app.config['EVENT_PARTITIONS_PREMAKE_MONTHS']
+        self.assertEqual(self.partition_names(), ['events_default'] +
+                         [f'events_p{month_start(current_month, i):%Y%m}' for i in range(premake_months + 1)])
+        event = self.add_event(created_at=datetime.utcnow())
+        partition, = db.session.execute(text(f'SELECT tableoid::regclass::text FROM events WHERE id = {event.id}')).one()
+        self.assertEqual(partition, f'events_p{current_month:%Y%m}')
+
+    def test_partitions_are_created_ahead_and_removed_once_expired(self):
+        current_month = month_start(datetime.utcnow())
+        connection = db.session.connection()
+        created = create_event_partitions(connection, months_ahead=5)
+        self.assertEqual(created, [f'events_p{month_start(current_month, i):%Y%m}' for i in (4, 5)])
+        self.assertEqual(create_event_partitions(connection, months_ahead=5), [])
+        db.session.commit()
+        later = month_start(current_month, 1) + timedelta(days=30)
+        old_event = self.add_event(created_at=current_month, expiration_date=later + timedelta(days=1))
+        recent_event_id = self.add_event(created_at=month_start(current_month, 1)).id
+        old_event_id = old_event.id
+
+        # the current month partition is kept while one of its events is not expired yet
+        connection = db.session.connection()
+        self.assertEqual(remove_expired_event_partitions(connection, now=later), [])
+        old_event.expiration_date = later - timedelta(days=1)
+        db.session.commit()
+        connection = db.session.connection()
+        removed = remove_expired_event_partitions(connection, detach_only=True, now=later)
+        db.session.commit()
+        self.assertEqual(removed, [f'events_p{current_month:%Y%m}'])
+        self.assertNotIn(removed[0], self.partition_names())
+        self.assertEqual([event.id for event in Event.query.all()], [recent_event_id])
+        # a detached partition keeps its rows as a standalone table
+        archived = db.session.execute(text(f'SELECT id FROM {removed[0]}')).scalars().all()
+        self.assertEqual(archived, [old_event_id])
+
+    def test_partitions_without_expiration_are_only_removed_by_the_retention_window(self):
+        current_month = month_start(datetime.utcnow())
+        # rows attached before partitioning, their range has no lower bound
+        db.session.execute(text(
+            f"CREATE TABLE events_legacy PARTITION OF events FOR VALUES FROM (MINVALUE) TO ('{current_month}')"
+        ))
+        db.session.commit()
+        self.add_event(created_at=current_month - timedelta(days=1))
+        self.add_event(created_at=current_month)
+        later = month_start(current_month, 1) + timedelta(days=30)
+
+        # only the past partition left empty is removed without a retention window
+        connection = db.session.connection()
+        self.assertEqual(remove_expired_event_partitions(connection, now=later),
+                         [f'events_p{month_start(current_month, 1):%Y%m}'])
+        self.assertEqual(remove_expired_event_partitions(connection, retention_days=31, now=later), [])
+        self.assertEqual(remove_expired_event_partitions(connection, retention_days=30, now=later),
+                         [f'events_p{current_month:%Y%m}'])
+        db.session.commit()
+        self.assertIn('events_legacy', self.partition_names())
+        self.assertEqual(Event.query.count(), 1)
+
+    def test_expired_events_are_purged_in_chunks(self):
+        app.config['EVENT_PURGE_CHUNK_SIZE'] = 2
+        now = datetime.utcnow()
+        for _ in range(5):
+            self.add_event(created_at=now, expiration_date=now - timedelta(hours=1))
+        kept_ids = {self.add_event(created_at=now, expiration_date=now + timedelta(days=1)).id,
+                    self.add_event(created_at=now).id}
+
+        result = apply_event_retention()
+        self.assertIsNone(app.config['EVENT_RETENTION_DAYS'])
+        self.assertEqual(result['deleted_events'], 5)
+        self.assertEqual(result['removed_partitions'], [])
+        self.assertEqual({event.id for event in Event.query.all()}, kept_ids)
+        self.assertEqual(apply_event_retention()['deleted_events'], 0)
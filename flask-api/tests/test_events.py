@@ -0,0 +1,90 @@
+import json
+from unittest import mock
+
+from project.extensions import db
+from project.models.user import UserRole
+from project.models.event import Event
+from project.models.event_descriptor import EventDescriptor
+from project.api.common.utils.constants import Constants
+from project.tasks.push_notification_tasks import process_pending_events
+from tests.base import BaseTestCase
+from tests.utils import add_user, add_group, capture_queries
+
+
+class TestEventsBlueprint(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.group = add_group(name='group')
+        db.session.add(EventDescriptor(id=1, name='event_name', description='{1} joined the group'))
+        db.session.commit()
+
+    def login(self, roles=UserRole.BACKEND_ADMIN) -> str:
+        add_user(email='test@test.com', password='test', roles=roles)
+        resp_login = self.client.post(
+            '/v1/auth/login',
+            data=json.dumps(dict(
+                email='test@test.com',
+                password='test'
+            )),
+            content_type='application/json',
+            headers=[('Accept', 'application/json')]
+        )
+        return json.loads(resp_login.data.decode())['auth_token']
+
+    def post_events(self, events, auth_token):
+        return self.client.post(
+            '/v1/events/batch',
+            data=json.dumps(events),
+            content_type='application/json',
+            headers=[('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+        )
+
+    def test_bulk_event_ingestion(self):
+        events = [dict(event_descriptor_id=1, group_id=self.group.id, entity_type='User', entity_id=i + 1,
+                       entity_description=f'user {i}') for i in range(20)]
+        events[0]['expiration_date'] = '2030-01-01T03:00:00+03:00'
+        with self.client:
+            auth_token = self.login()
+            with mock.patch.object(process_pending_events, 'delay') as delay, capture_queries() as statements:
+                response = self.post_events(events, auth_token)
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(data['status'], 'success')
+            self.assertEqual(data['data']['events'], 20)
+            self.assertEqual(len([s for s in statements if s.lstrip().upper().startswith('INSERT')]), 1)
+            delay.assert_called_once_with()
+            stored = Event.query.order_by(Event.id).all()
+            self.assertEqual([event.entity_description for event in stored], [f'user {i}' for i in range(20)])
+            self.assertTrue(all(not event.is_processed and event.group_id == self.group.id for event in stored))
+            self.assertEqual(stored[0].expiration_date.isoformat(), '2030-01-01T00:00:00')
+            self.assertEqual(stored[0].render_message(), 'user 0 joined the group')
+
+    def test_bulk_event_ingestion_invalid_events(self):
+        valid = dict(event_descriptor_id=1, group_id=self.group.id)
+        invalid_payloads = [
+            ([], 'Invalid payload.'),
+            (valid, 'Invalid payload.'),
+            ([valid, dict(valid, event_descriptor_id=2)], 'Invalid event at index 1: unknown event_descriptor_id.'),
+            ([valid, valid, dict(valid, group_id=self.group.id + 1)], 'Invalid event at index 2: unknown group_id.'),
+            ([dict(valid, group_id=None)], 'Invalid event at index 0: invalid group_id.'),
+            ([dict(valid, entity_2_id='1')], 'Invalid event at index 0: invalid entity_2_id.'),
+            ([dict(valid, entity_description='x' * 129)], 'Invalid event at index 0: invalid entity_description.'),
+            ([dict(valid, expiration_date='tomorrow')], 'Invalid event at index 0: invalid expiration_date.'),
+        ]
+        with self.client:
+            auth_token = self.login()
+            with mock.patch.object(process_pending_events, 'delay') as delay:
+                for payload, message in invalid_payloads:
+                    response = self.post_events(payload, auth_token)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(json.loads(response.data.decode())['message'], message)
+            delay.assert_not_called()
+            self.assertEqual(Event.query.count(), 0)
+
+    def test_bulk_event_ingestion_requires_admin(self):
+        with self.client:
+            auth_token = self.login(roles=UserRole.USER)
+            response = self.post_events([dict(event_descriptor_id=1, group_id=self.group.id)], auth_token)
+            self.assertEqual(response.status_code, 403)
+            self.assertEqual(Event.query.count(), 0)
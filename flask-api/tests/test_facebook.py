@@ -0,0 +1,65 @@
+# project/tests/test_facebook.py
+
+import json
+import time
+from urllib.parse import urlparse, parse_qs
+
+from facepy.exceptions import FacepyError
+
+from project import app
+from project.extensions import facebook_graph_client
+from tests.base import BaseTestCase
+from tests.utils import StubHTTPServer
+
+
+class TestFacebookGraphClient(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.delay = 0
+        self.stub = StubHTTPServer(self.respond_profile)
+        app.config['FACEBOOK_GRAPH_URL'] = self.stub.url
+        app.config['FACEBOOK_GRAPH_TIMEOUT_SECONDS'] = 0.5
+        facebook_graph_client.init_app(app)
+
+    def tearDown(self):
+        self.stub.close()
+        app.config.from_object('project.config.TestingConfig')
+        facebook_graph_client.init_app(app)
+        super().tearDown()
+
+    def respond_profile(self, handler):
+        time.sleep(self.delay)
+        query = parse_qs(urlparse(handler.path).query)
+        token = query['access_token'][0]
+        profile = {'id': token, 'name': 'Test User', 'email': f'{token}@test.com', 'link': 'https://facebook.com/test'}
+        return 200, {'Content-Type': 'application/json'}, json.dumps(profile).encode()
+
+    def test_profile_is_cached(self):
+        for _ in range(3):
+            profile = facebook_graph_client.get_profile('token1')
+            self.assertEqual(profile['email'], 'token1@test.com')
+        facebook_graph_client.get_profile('token2')
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertTrue(self.stub.requests[0].startswith('/me?'))
+
+    def test_slow_graph_response_times_out(self):
+        self.delay = 1
+        start = time.time()
+        self.assertRaises(FacepyError, facebook_graph_client.get_profile, 'token1')
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_facebook_login(self):
+        with self.client:
+            for code in (201, 200):
+                response = self.client.post(
+                    '/v1/auth/facebook/login',
+                    data=json.dumps(dict(fb_access_token='token1')),
+                    content_type='application/json',
+                    headers=[('Accept', 'application/json')]
+                )
+                data = json.loads(response.data.decode())
+                self.assertEqual(response.status_code, code)
+                self.assertEqual(data['status'], 'success')
+        self.assertEqual(len(self.stub.requests), 1)
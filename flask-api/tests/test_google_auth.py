@@ -0,0 +1,85 @@
+# project/tests/test_google_auth.py
+
+import json
+import threading
+import time
+
+import rsa
+from google.auth import crypt, jwt
+
+from project import app
+from project.extensions import google_token_verifier
+from tests.base import BaseTestCase
+from tests.utils import StubHTTPServer
+
+CLIENT_ID = 'my-google-client-id.apps.googleusercontent.com'
+
+
+class TestGoogleTokenVerifier(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        public_key, private_key = rsa.newkeys(1024)
+        self.signer = crypt.RSASigner.from_string(private_key.save_pkcs1(), key_id='kid1')
+        self.certs = {'kid1': public_key.save_pkcs1().decode()}
+        self.max_age = 3600
+        self.stub = StubHTTPServer(self.respond_certs)
+        app.config['GOOGLE_CLIENT_ID'] = CLIENT_ID
+        app.config['GOOGLE_OAUTH2_CERTS_URL'] = self.stub.url + '/oauth2/v1/certs'
+        google_token_verifier.init_app(app)
+
+    def tearDown(self):
+        self.stub.close()
+        app.config.from_object('project.config.TestingConfig')
+        google_token_verifier.init_app(app)
+        super().tearDown()
+
+    def respond_certs(self, _):
+        headers = {'Content-Type': 'application/json', 'Cache-Control': f'public, max-age={self.max_age}, must-revalidate'}
+        return 200, headers, json.dumps(self.certs).encode()
+
+    def id_token(self, **claims):
+        now = int(time.time())
+        payload = {'iss': 'https://accounts.google.com', 'aud': CLIENT_ID, 'iat': now, 'exp': now + 3600,
+                   'sub': '1234', 'email': 'test@gmail.com', 'email_verified': True,
+                   'given_name': 'given', 'family_name': 'family'}
+        payload.update(claims)
+        return jwt.encode(self.signer, payload).decode()
+
+    def test_certs_are_fetched_once(self):
+        for _ in range(3):
+            idinfo = google_token_verifier.verify(self.id_token(), CLIENT_ID)
+            self.assertEqual(idinfo['sub'], '1234')
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_concurrent_refresh_is_single_flight(self):
+        token = self.id_token()
+        threads = [threading.Thread(target=google_token_verifier.verify, args=(token, CLIENT_ID)) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_expired_certs_are_refetched(self):
+        self.max_age = 0
+        google_token_verifier.verify(self.id_token(), CLIENT_ID)
+        google_token_verifier.verify(self.id_token(), CLIENT_ID)
+        self.assertEqual(len(self.stub.requests), 2)
+
+    def test_wrong_audience_and_issuer(self):
+        self.assertRaises(ValueError, google_token_verifier.verify, self.id_token(aud='other'), CLIENT_ID)
+        self.assertRaises(Exception, google_token_verifier.verify, self.id_token(iss='https://evil.com'), CLIENT_ID)
+
+    def test_google_login(self):
+        with self.client:
+            response = self.client.post(
+                '/v1/auth/google/login',
+                data=json.dumps(dict(client_id=CLIENT_ID, credential=self.id_token())),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(data['status'], 'success')
+            self.assertTrue(data['auth_token'])
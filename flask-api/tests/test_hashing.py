@@ -0,0 +1,60 @@
+# project/tests/test_hashing.py
+
+import json
+
+from project import app
+from project.extensions import password_hasher
+from project.api.common.utils.hashing import PasswordHasher
+from project.api.common.utils.exceptions import ServiceUnavailableException
+from tests.base import BaseTestCase
+from tests.utils import add_user
+
+
+class TestPasswordHasher(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        app.config['HASHING_POOL_SIZE'] = 1
+        app.config['HASHING_MAX_PENDING'] = 1
+        self.hasher = PasswordHasher()
+        self.hasher.init_app(app)
+
+    def tearDown(self):
+        self.hasher.shutdown()
+        super().tearDown()
+
+    def test_hash_on_process_pool(self):
+        pw_hash = self.hasher.generate_password_hash('password')
+        self.assertTrue(self.hasher.check_password_hash(pw_hash, 'password'))
+        self.assertFalse(self.hasher.check_password_hash(pw_hash, 'wrong_password'))
+        self.assertFalse(self.hasher.check_password_hash(None, 'password'))
+
+    def test_saturated_pool_fails_fast(self):
+        self.hasher._slots.acquire()
+        try:
+            self.assertRaises(ServiceUnavailableException, self.hasher.generate_password_hash, 'password')
+        finally:
+            self.hasher._slots.release()
+
+    def test_saturated_login_returns_503(self):
+        add_user(email='test@test.com', password='test')
+        password_hasher.init_app(app)
+        password_hasher._slots.acquire()
+        try:
+            with self.client:
+                response = self.client.post(
+                    '/v1/auth/login',
+                    data=json.dumps(dict(
+                        email='test@test.com',
+                        password='test'
+                    )),
+                    content_type='application/json',
+                    headers=[('Accept', 'application/json')]
+                )
+                data = json.loads(response.data.decode())
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(data['status'], 'error')
+        finally:
+            password_hasher._slots.release()
+            app.config.from_object('project.config.TestingConfig')
+            password_hasher.init_app(app)
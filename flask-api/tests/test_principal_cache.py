@@ -0,0 +1,77 @@
+# project/tests/test_principal_cache.py
+
+import json
+
+from project.extensions import db, principal_cache
+from project.models.user import User, UserRole
+from project.api.common.utils.constants import Constants
+from project.api.common.utils.principal_cache import Principal
+from tests.base import BaseTestCase
+from tests.utils import add_user
+
+
+class TestPrincipalCache(BaseTestCase):
+
+    def test_principal_is_cached(self):
+        if principal_cache.redis is None:
+            self.skipTest('principal cache redis url not configured')
+        user = add_user(email='test@test.com', password='test', roles=UserRole.USER_ADMIN)
+        with self.client:
+            response = self.client.get(
+                '/v1/auth/logout',
+                headers=[('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + user.encode_auth_token())]
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(principal_cache.get(user.id), Principal(id=user.id, active=True, roles=UserRole.USER_ADMIN.value))
+
+    def test_user_update_invalidates_principal(self):
+        user = add_user(email='test@test.com', password='test')
+        auth_token = user.encode_auth_token()
+        with self.client:
+            response = self.client.get(
+                '/v1/auth/logout',
+                headers=[('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+            )
+            self.assertEqual(response.status_code, 200)
+
+            user = User.get(user.id)
+            user.active = False
+            db.session.commit()
+            self.assertIsNone(principal_cache.get(user.id))
+
+            response = self.client.get(
+                '/v1/auth/logout',
+                headers=[('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(data['message'], 'Something went wrong. Please contact us.')
+            self.assertEqual(response.status_code, 401)
+
+    def test_user_delete_invalidates_principal(self):
+        user = add_user(email='test@test.com', password='test')
+        principal_cache.set(Principal.from_user(user), principal_cache.version(user.id))
+        db.session.delete(user)
+        db.session.commit()
+        self.assertIsNone(principal_cache.get(user.id))
+
+    def test_rollback_discards_pending_invalidations(self):
+        user = add_user(email='test@test.com', password='test')
+        user.active = False
+        db.session.flush()
+        self.assertIn(user.id, db.session.info[principal_cache._PENDING_KEY])
+        db.session.rollback()
+        self.assertNotIn(principal_cache._PENDING_KEY, db.session.info)
+
+    def test_principal_loaded_before_an_invalidation_is_not_served(self):
+        if principal_cache.redis is None:
+            self.skipTest('principal cache redis url not configured')
+        user = add_user(email='test@test.com', password='test')
+        # a reader loads the user, the user is deactivated and invalidated, then the reader caches what it loaded
+        version = principal_cache.version(user.id)
+        stale = Principal.from_user(user)
+        user.active = False
+        db.session.commit()
+        principal_cache.set(stale, version)
+        self.assertIsNone(principal_cache.get(user.id))
+        principal_cache.set(Principal.from_user(user), principal_cache.version(user.id))
+        self.assertEqual(principal_cache.get(user.id), Principal(id=user.id, active=False, roles=user.roles))
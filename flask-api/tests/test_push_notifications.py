@@ -0,0 +1,188 @@
+# project/tests/test_push_notifications.py
+
+from unittest import mock
+
+from project import app
+from project.extensions import push_sender
+from project.extensions import db, event_descriptor_catalog
+from project.models.device import Device
+from project.models.event import Event
+from project.models.event_descriptor import EventDescriptor
+from project.api.common.utils.push_notification import send_notifications_for_event
+from project.tasks.push_notification_tasks import send_async_push_notifications, send_event_push_notifications, \
+    process_pending_events
+from tests.base import BaseTestCase
+from tests.utils import add_user, add_group, add_user_group_association, add_device, capture_queries
+
+
+class TestPushNotifications(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        app.config['PUSH_NOTIFICATIONS_CHUNK_SIZE'] = 2
+        app.config['PUSH_NOTIFICATIONS_BATCHES_PER_TASK'] = 1
+
+    def tearDown(self):
+        app.config.from_object('project.config.TestingConfig')
+        super().tearDown()
+
+    def test_event_notifications_are_sent_in_chunks(self):
+        group = add_group(name='group')
+        creator = add_user(email='creator@test.com', password='test')
+        add_user_group_association(user=creator, group=group)
+        add_device(device_id='creator_device', device_type='apple', pn_token='creator_token', user=creator)
+        for i in range(5):
+            member = add_user(email=f'member{i}@test.com', password='test')
+            add_user_group_association(user=member, group=group)
+            add_device(device_id=f'device_{i}', device_type='apple', pn_token=f'token_{i}', user=member)
+        db.session.add(EventDescriptor(id=1, name='event_name', description='{1} joined the group'))
+        event = Event(event_descriptor_id=1)
+        event.group_id = group.id
+        event.creator_id = creator.id
+        event.entity_description = 'creator'
+        db.session.add(event)
+        db.session.commit()
+
+        # the request only queues the event id
+        with mock.patch.object(send_event_push_notifications, 'delay') as delay:
+            send_notifications_for_event(event=event)
+        delay.assert_called_once_with(event_id=event.id)
+
+        # the worker resolves the audience and queues one task per chunk
+        with mock.patch.object(send_async_push_notifications, 'delay') as delay:
+            send_event_push_notifications(event.id)
+        self.assertEqual(delay.call_count, 3)
+        pn_tokens = [token for call in delay.call_args_list for token in call.kwargs['pn_tokens']]
+        self.assertEqual(sorted(pn_tokens), [f'token_{i}' for i in range(5)])
+        self.assertEqual(delay.call_args.kwargs['message_body'], 'creator joined the group')
+        db.session.refresh(event)
+        self.assertTrue(event.is_processed)
+
+        # an already processed event is not sent again
+        with mock.patch.object(send_async_push_notifications, 'delay') as delay:
+            send_event_push_notifications(event.id)
+        delay.assert_not_called()
+
+    def test_dead_and_canonical_pn_tokens_are_applied(self):
+        app.config['PUSH_NOTIFICATIONS_CHUNK_SIZE'] = 2
+        user = add_user(email='test@test.com', password='test')
+        pn_tokens = ['token_ok', 'token_dead', 'token_invalid', 'token_old', 'token_duplicate', 'token_ok_2', 'token_timeout']
+        for pn_token in pn_tokens:
+            add_device(device_id=f'device_{pn_token}', device_type='android', pn_token=pn_token, user=user)
+        responses = [
+            {'multicast_id': 1, 'success': 1, 'failure': 1, 'canonical_ids': 0,
+             'results': [{'message_id': '1'}, {'error': 'NotRegistered'}]},
+            {'multicast_id': 2, 'success': 1, 'failure': 1, 'canonical_ids': 1,
+             'results': [{'error': 'InvalidRegistration'}, {'message_id': '2', 'registration_id': 'token_new'}]},
+            {'multicast_id': 3, 'success': 2, 'failure': 0, 'canonical_ids': 1,
+             'results': [{'message_id': '3', 'registration_id': 'token_ok'}, {'message_id': '4'}]},
+            None
+        ]
+        with mock.patch.object(push_sender, 'send_multicast', return_value=responses) as send_multicast:
+            counts = send_async_push_notifications(message_title='title', message_body='body', pn_tokens=pn_tokens)
+        self.assertEqual(send_multicast.call_args.args[0], [pn_tokens[0:2], pn_tokens[2:4], pn_tokens[4:6], pn_tokens[6:]])
+        self.assertEqual(counts, {'success': 4, 'failure': 3, 'dead': 2, 'canonical': 2, 'updated_devices': 4, 'failed_batches': 1})
+        db.session.expire_all()
+        devices = {device.device_id: device for device in Device.query.all()}
+        self.assertTrue(devices['device_token_ok'].active)
+        self.assertEqual(devices['device_token_ok'].pn_token, 'token_ok')
+        for device_id in ['device_token_dead', 'device_token_invalid', 'device_token_duplicate']:
+            self.assertFalse(devices[device_id].active)
+            self.assertIsNone(devices[device_id].pn_token)
+        self.assertTrue(devices['device_token_old'].active)
+        self.assertEqual(devices['device_token_old'].pn_token, 'token_new')
+        self.assertTrue(devices['device_token_timeout'].active)
+
+    def test_pending_events_are_processed_in_batches(self):
+        app.config['EVENT_PROCESSING_BATCH_SIZE'] = 2
+        group = add_group(name='group')
+        creator = add_user(email='creator@test.com', password='test')
+        member = add_user(email='member@test.com', password='test')
+        add_user_group_association(user=creator, group=group)
+        add_user_group_association(user=member, group=group)
+        add_device(device_id='member_device', device_type='apple', pn_token='member_token', user=member)
+        db.session.add(EventDescriptor(id=1, name='event_name', description='{1} joined the group'))
+        for i in range(5):
+            event = Event(event_descriptor_id=1)
+            event.group_id = group.id
+            event.creator_id = creator.id
+            event.entity_description = f'user {i}'
+            event.is_processed = i == 0
+            db.session.add(event)
+        db.session.commit()
+
+        with mock.patch.object(send_async_push_notifications, 'delay') as delay:
+            self.assertEqual(process_pending_events(), 4)
+        self.assertEqual([call.kwargs['message_body'] for call in delay.call_args_list],
+                         [f'user {i} joined the group' for i in range(1, 5)])
+        self.assertTrue(all(call.kwargs['pn_tokens'] == ['member_token'] for call in delay.call_args_list))
+        self.assertEqual(Event.query.filter(~Event.is_processed).count(), 0)
+
+        # nothing left to claim
+        with mock.patch.object(send_async_push_notifications, 'delay') as delay:
+            self.assertEqual(process_pending_events(), 0)
+        delay.assert_not_called()
+
+    def test_capped_run_queues_a_follow_up_run(self):
+        app.config['EVENT_PROCESSING_BATCH_SIZE'] = 2
+        app.config['EVENT_PROCESSING_MAX_BATCHES'] = 2
+        group = add_group(name='group')
+        db.session.add(EventDescriptor(id=1, name='event_name', description='{1} joined the group'))
+        for i in range(5):
+            event = Event(event_descriptor_id=1)
+            event.group_id = group.id
+            db.session.add(event)
+        db.session.commit()
+
+        # the run stops at its cap with a full last batch, the backlog left is queued right away
+        with mock.patch.object(process_pending_events, 'delay') as delay:
+            self.assertEqual(process_pending_events(), 4)
+        delay.assert_called_once_with()
+        # a partial batch means the backlog is drained
+        with mock.patch.object(process_pending_events, 'delay') as delay:
+            self.assertEqual(process_pending_events(), 1)
+        delay.assert_not_called()
+
+    def test_event_fan_out_queries_do_not_grow_with_the_audience(self):
+        app.config['PUSH_NOTIFICATIONS_CHUNK_SIZE'] = 100
+        groups = [add_group(name='small_group'), add_group(name='large_group')]
+        for i in range(6):
+            member = add_user(email=f'member{i}@test.com', password='test')
+            add_user_group_association(user=member, group=groups[0 if i == 0 else 1])
+            for j in range(2):
+                add_device(device_id=f'device_{i}_{j}', device_type='apple', pn_token=f'token_{i}_{j}', user=member)
+        db.session.add(EventDescriptor(id=1, name='event_name', description='{1} joined the group'))
+        for group in (groups[0], groups[1], groups[1]):
+            event = Event(event_descriptor_id=1)
+            event.group_id = group.id
+            db.session.add(event)
+        db.session.commit()
+        event_descriptor_catalog.get(1)
+
+        with mock.patch.object(send_async_push_notifications, 'delay') as delay, capture_queries() as statements:
+            self.assertEqual(process_pending_events(), 3)
+        self.assertEqual([len(call.kwargs['pn_tokens']) for call in delay.call_args_list], [2, 10, 10])
+        # claim, one audience query per event whatever its members and devices count, mark processed;
+        # no user, membership or descriptor is loaded one by one
+        self.assertEqual(len(statements), 5)
+        audience_queries = [s for s in statements if 'JOIN user_group_associations' in s]
+        self.assertEqual(len(audience_queries), 3)
+        self.assertFalse([s for s in statements if 'FROM users' in s or 'FROM event_descriptors' in s])
+
+    def test_event_without_creator_notifies_the_whole_group(self):
+        group = add_group(name='group')
+        for i in range(3):
+            member = add_user(email=f'member{i}@test.com', password='test')
+            add_user_group_association(user=member, group=group)
+            add_device(device_id=f'device_{i}', device_type='apple', pn_token=f'token_{i}', user=member)
+        db.session.add(EventDescriptor(id=1, name='event_name', description='{1} was created'))
+        event = Event(event_descriptor_id=1)
+        event.group_id = group.id
+        event.entity_description = 'group'
+        db.session.add(event)
+        db.session.commit()
+
+        with mock.patch.object(send_async_push_notifications, 'delay') as delay:
+            send_event_push_notifications(event.id)
+        pn_tokens = [token for call in delay.call_args_list for token in call.kwargs['pn_tokens']]
+        self.assertEqual(sorted(pn_tokens), [f'token_{i}' for i in range(3)])
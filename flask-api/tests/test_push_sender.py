@@ -0,0 +1,56 @@
+# project/tests/test_push_sender.py
+
+import json
+import time
+
+from project import app
+from project.extensions import push_sender
+from tests.fcm_stub import fcm_response
+from tests.base import BaseTestCase
+from tests.utils import StubHTTPServer
+
+
+class TestAsyncPushSender(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.latency = 0.2
+        self.stub = StubHTTPServer(self.respond_send)
+        app.config['FCM_ENDPOINT'] = self.stub.url + '/fcm/send'
+        app.config['PUSH_SENDER_CONCURRENCY'] = 4
+        app.config['PUSH_SENDER_TIMEOUT_SECONDS'] = 1
+        push_sender.init_app(app)
+
+    def tearDown(self):
+        self.stub.close()
+        app.config.from_object('project.config.TestingConfig')
+        push_sender.init_app(app)
+        super().tearDown()
+
+    def respond_send(self, handler):
+        payload = json.loads(handler.rfile.read(int(handler.headers['Content-Length'])))
+        time.sleep(self.latency)
+        return 200, {'Content-Type': 'application/json'}, json.dumps(fcm_response(payload)).encode()
+
+    def test_batches_are_sent_concurrently(self):
+        batches = [[f'token_{batch}_{i}' for i in range(3)] for batch in range(4)]
+        start = time.perf_counter()
+        responses = push_sender.send_multicast(batches, message_title='title', message_body='body')
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(self.stub.requests), 4)
+        self.assertEqual([response['success'] for response in responses], [3, 3, 3, 3])
+        self.assertEqual(len(responses[0]['results']), 3)
+        # sequential requests would take 4 * latency
+        self.assertLess(elapsed, 2 * self.latency)
+
+    def test_connections_are_reused_across_calls(self):
+        self.latency = 0
+        push_sender.send_multicast([['token_1']], message_title='title', message_body='body')
+        session = push_sender._session
+        push_sender.send_multicast([['token_2']], message_title='title', message_body='body')
+        self.assertIs(push_sender._session, session)
+
+    def test_timed_out_batch_returns_none(self):
+        self.latency = 1.5
+        responses = push_sender.send_multicast([['token_1']], message_title='title', message_body='body')
+        self.assertEqual(responses, [None])
@@ -0,0 +1,59 @@
+# project/tests/test_token_cache.py
+
+import json
+import time
+
+from project.extensions import token_cache
+from project.models.user import User
+from project.api.common.utils.constants import Constants
+from project.api.common.utils.token_cache import VerifiedTokenCache
+from tests.base import BaseTestCase
+from tests.utils import add_user
+
+
+class TestVerifiedTokenCache(BaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+
+    def test_authenticated_requests_hit_cache(self):
+        user = add_user(email='test@test.com', password='test')
+        auth_token = user.encode_auth_token()
+        with self.client:
+            for _ in range(3):
+                response = self.client.get(
+                    '/v1/auth/status',
+                    headers=[('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+                )
+                self.assertEqual(response.status_code, 200)
+        stats = token_cache.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['size'], 1)
+
+    def test_expired_token_is_evicted(self):
+        user = add_user(email='test@test.com', password='test')
+        auth_token = user.encode_auth_token()
+        self.assertEqual(token_cache.get_or_decode(auth_token, User.decode_auth_token_payload)['sub'], user.id)
+        time.sleep(4)
+        with self.client:
+            response = self.client.get(
+                '/v1/auth/status',
+                headers=[('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)]
+            )
+            data = json.loads(response.data.decode())
+            self.assertEqual(data['message'], 'Signature expired. Please log in again.')
+            self.assertEqual(response.status_code, 401)
+        self.assertEqual(token_cache.stats()['size'], 0)
+
+    def test_cache_is_bounded(self):
+        cache = VerifiedTokenCache(maxsize=2)
+        exp = time.time() + 60
+        cache.set('token1', {'sub': 1, 'exp': exp})
+        cache.set('token2', {'sub': 2, 'exp': exp})
+        cache.set('token3', {'sub': 3, 'exp': exp})
+        self.assertIsNone(cache.get('token1'))
+        self.assertEqual(cache.get('token2')['sub'], 2)
+        self.assertEqual(cache.get('token3')['sub'], 3)
+        self.assertEqual(cache.stats()['size'], 2)
@@ -6,7 +6,7 @@ import datetime
 from project.api.common.utils.constants import Constants
 from tests.base import BaseTestCase
 from project.models.user import UserRole
-from tests.utils import add_user
+from tests.utils import add_user, capture_queries
 
 
 
@@ -161,6 +161,24 @@ class TestUsersBlueprint(BaseTestCase):
             self.assertIn('success', data['status'])
 
 
+    def test_single_user_selects_only_needed_columns(self):
+        """Ensure get single user does not load the whole user row."""
+        user = add_user(email='abc@abc.com', password='password')
+        admin = add_user(email='test@test.com', password='test', roles=UserRole.BACKEND_ADMIN)
+        auth_token = admin.encode_auth_token()
+        with self.client:
+            with capture_queries() as statements:
+                response = self.client.get(f'/v1/users/{user.id}', headers=[('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + auth_token)])
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(set(data['data'].keys()), {'username', 'email', 'created_at'})
+            self.assertIn('abc@abc.com', data['data']['email'])
+            projection = statements[-1]
+            self.assertIn('users.email', projection)
+            self.assertNotIn('access_token', projection)
+            self.assertNotIn('password', projection)
+
+
     def test_single_user_no_id(self):
         """Ensure error is thrown if an id is not provided."""
         add_user(email='test@test.com', password='test', roles=UserRole.BACKEND_ADMIN)
@@ -232,3 +250,82 @@ class TestUsersBlueprint(BaseTestCase):
             self.assertIn('fletcher@realpython.com', data['data']['users'][0]['email'])
 
             self.assertIn('success', data['status'])
+
+    def test_all_users_pagination(self):
+        """Ensure get all users is keyset paginated using ITEMS_PER_PAGE."""
+        created = datetime.datetime.utcnow()
+        for i in range(24):
+            add_user(email=f'user{i}@test.com', password='password', created_at=created + datetime.timedelta(minutes=i % 5))
+        add_user(email='test@test.com', password='test', roles=UserRole.BACKEND_ADMIN, created_at=created)
+        with self.client:
+            resp_login = self.client.post(
+                '/v1/auth/login',
+                data=json.dumps(dict(
+                    email='test@test.com',
+                    password='test'
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            headers = [('Accept', 'application/json'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + json.loads(resp_login.data.decode())['auth_token'])]
+            response = self.client.get('/v1/users', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            first_page = data['data']['users']
+            self.assertEqual(len(first_page), 20)
+            self.assertTrue(data['data']['next_cursor'])
+            response = self.client.get(f'/v1/users?cursor={data["data"]["next_cursor"]}', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(response.status_code, 200)
+            second_page = data['data']['users']
+            self.assertEqual(len(second_page), 5)
+            self.assertIsNone(data['data']['next_cursor'])
+            ids = [user['id'] for user in first_page + second_page]
+            self.assertEqual(len(set(ids)), 25)
+            response = self.client.get('/v1/users?limit=10', headers=headers)
+            data = json.loads(response.data.decode())
+            self.assertEqual(len(data['data']['users']), 10)
+            self.assertEqual(ids[:10], [user['id'] for user in data['data']['users']])
+            response = self.client.get('/v1/users?cursor=invalid', headers=headers)
+            self.assertEqual(response.status_code, 400)
+
+    def test_export_users(self):
+        """Ensure users export streams one json line per user."""
+        for i in range(5):
+            add_user(email=f'user{i}@test.com', password='password')
+        add_user(email='test@test.com', password='test', roles=UserRole.BACKEND_ADMIN)
+        with self.client:
+            resp_login = self.client.post(
+                '/v1/auth/login',
+                data=json.dumps(dict(
+                    email='test@test.com',
+                    password='test'
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            response = self.client.get('/v1/users/export', headers=[('Accept', 'application/x-ndjson'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + json.loads(resp_login.data.decode())['auth_token'])])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, 'application/x-ndjson')
+            self.assertTrue(response.is_streamed)
+            users = [json.loads(line) for line in response.data.decode().splitlines()]
+            self.assertEqual(len(users), 6)
+            self.assertEqual([user['id'] for user in users], sorted(user['id'] for user in users))
+            self.assertIn('test@test.com', [user['email'] for user in users])
+            self.assertNotIn('password', users[0])
+
+    def test_export_users_not_admin(self):
+        """Ensure users export requires backend admin role."""
+        add_user(email='test@test.com', password='test')
+        with self.client:
+            resp_login = self.client.post(
+                '/v1/auth/login',
+                data=json.dumps(dict(
+                    email='test@test.com',
+                    password='test'
+                )),
+                content_type='application/json',
+                headers=[('Accept', 'application/json')]
+            )
+            response = self.client.get('/v1/users/export', headers=[('Accept', 'application/x-ndjson'), (Constants.HttpHeaders.AUTHORIZATION, 'Bearer ' + json.loads(resp_login.data.decode())['auth_token'])])
+            self.assertEqual(response.status_code, 403)
@@ -1,13 +1,19 @@
 # project/tests/utils.py
 
 import datetime
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlalchemy import event
 
 from project import app
-from project.extensions import bcrypt, db
+from project.extensions import db
 from project.models.user import User, UserRole
 from project.models.device import Device
 from project.models.group import Group
 from project.models.user_group_association import UserGroupAssociation
+from project.api.common.utils.one_time_tokens import token_digest
 
 
 
@@ -38,11 +44,55 @@ def add_user_group_association(user: User, group: Group):
     return user_group_association
 
 def set_user_token_hash(user: User, token: str):
-    user.token_hash = bcrypt.generate_password_hash(token, app.config.get('BCRYPT_LOG_ROUNDS')).decode()
+    user.token_hash = token_digest(token)
     db.session.commit()
     return user
 
 def set_user_email_token_hash(user: User, token: str):
-    user.email_token_hash = bcrypt.generate_password_hash(token, app.config.get('BCRYPT_LOG_ROUNDS')).decode()
+    user.email_token_hash = token_digest(token)
     db.session.commit()
     return user
+
+@contextmanager
+def capture_queries():
+    """Collects the SQL statements emitted by the db engine inside the block."""
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+class StubHTTPServer:
+    """Local stand-in for third party http services, `respond(handler)` returns (status, headers, body)"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def handle_request(self):
+                stub.requests.append(self.path)
+                status, headers, body = stub.respond(self)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()